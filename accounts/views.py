@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import login, logout, authenticate
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from core.uploadhandlers import rejected_uploads
 from .models import User
 
 def register_view(request):
@@ -75,6 +76,11 @@ def profile_view(request):
         user.phone = request.POST.get('phone', user.phone)
         user.address = request.POST.get('address', user.address)
         
+        rejected = rejected_uploads(request, 'profile_picture')
+        if rejected:
+            messages.error(request, rejected[0])
+            return redirect('accounts:profile')
+        
         if request.FILES.get('profile_picture'):
             user.profile_picture = request.FILES['profile_picture']
         
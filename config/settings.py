@@ -102,6 +102,23 @@ DATABASES = {
     }
 }
 
+# Koneksi kedua ke database yang sama untuk sewa nomor worker core.ids; commit
+# sendiri sehingga tidak ikut rollback transaksi request
+DATABASES['ids'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
+
+# Cache
+# Dipakai bersama oleh semua worker gunicorn (version key tarif COD, dsb).
+# Default memakai tabel database: jalankan `python manage.py createcachetable`
+# setelah migrate. Bisa diganti Redis lewat CACHE_BACKEND / CACHE_LOCATION.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'django_cache'),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -147,6 +164,14 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Upload gambar divalidasi (magic bytes & ukuran per field) sambil streaming,
+# sebelum disimpan ke memori/file sementara
+FILE_UPLOAD_HANDLERS = [
+    'core.uploadhandlers.ImageUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,27 @@
+"""Version key di cache bersama untuk invalidasi data ter-cache antar worker"""
+from django.core.cache import cache
+import time
+
+
+def get_version(key):
+    """Version saat ini untuk `key`; dibuat otomatis jika belum ada"""
+    version = cache.get(key)
+    if version is None:
+        # Version baru berbasis waktu agar tidak bentrok dengan version lama yang ter-evict
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """Naikkan version sehingga semua entry cache yang memakai version lama usang"""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def get_versions(*keys):
+    """Version beberapa key sekaligus dengan satu get_many"""
+    versions = cache.get_many(keys)
+    return [versions[key] if key in versions else get_version(key) for key in keys]
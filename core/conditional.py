@@ -0,0 +1,32 @@
+"""ETag untuk conditional GET (django.views.decorators.http.condition).
+
+Validator dibangun dari version key / timestamp yang murah dibaca, ditambah
+identitas pengunjung: halaman memuat navbar, token CSRF dan jarak yang berbeda
+per user/session, jadi ETag yang sama tidak boleh berlaku untuk user lain.
+Jika masih ada flash message yang belum tampil, tidak ada ETag sehingga halaman
+selalu dirender penuh.
+"""
+import hashlib
+
+
+def visitor_parts(request):
+    """Bagian ETag yang bergantung pada user & session"""
+    user = request.user
+    return [
+        user.pk,
+        user.username,
+        user.get_full_name(),
+        getattr(user, 'role', ''),
+        getattr(getattr(user, 'profile_picture', None), 'name', ''),
+        request.META.get('CSRF_COOKIE', ''),
+        request.session.get('user_latitude'),
+        request.session.get('user_longitude'),
+    ]
+
+
+def page_etag(request, *parts):
+    """ETag (hex) untuk `parts` + pengunjung, atau None jika halaman harus dirender ulang"""
+    if len(getattr(request, '_messages', ())):
+        return None
+    payload = repr([*parts, *visitor_parts(request)])
+    return hashlib.sha1(payload.encode()).hexdigest()
@@ -0,0 +1,160 @@
+"""Idempotency key untuk POST yang tidak boleh jalan dua kali (buat order, upload bukti bayar).
+
+Form menyertakan key acak ({% idempotency_key_field %}) atau client mengirim
+header Idempotency-Key. Request pertama dengan key tersebut "mengklaim" key
+lewat insert ke tabel idempotency_keys (unique per user, view & key) sebelum
+view dijalankan, lalu menyimpan redirect hasilnya. Submit ulang dengan key yang
+sama (double tap, retry setelah koneksi putus) langsung dibalas redirect yang
+sama tanpa menjalankan view lagi.
+
+Hanya redirect tanpa pesan error yang disimpan. Respons lain (validasi gagal,
+form dirender ulang, exception) melepas klaim sehingga key boleh dipakai lagi.
+Key kedaluwarsa setelah KEY_TTL dan dihapus berkala oleh worker.
+"""
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from datetime import timedelta
+from functools import wraps
+import re
+import threading
+import time
+import uuid
+
+HEADER = 'Idempotency-Key'
+FIELD_NAME = 'idempotency_key'
+
+KEY_PATTERN = re.compile(r'^[A-Za-z0-9_-]{8,100}$')
+
+KEY_TTL = timedelta(hours=24)
+
+# Klaim tanpa hasil lebih lama dari ini dianggap milik request yang mati (timeout gunicorn 120 detik)
+PENDING_TIMEOUT = timedelta(minutes=3)
+
+# Submit ganda menunggu request pertama selesai paling lama sekian detik
+REPLAY_WAIT = 5
+REPLAY_POLL_INTERVAL = 0.25
+
+# Seberapa sering (detik) worker menghapus key kedaluwarsa
+PURGE_INTERVAL = 60 * 10
+
+_purge_lock = threading.Lock()
+_purge = {'purged_at': 0.0}
+
+
+def new_key():
+    return uuid.uuid4().hex
+
+
+def request_key(request):
+    """Idempotency key dari header atau field form, None jika tidak ada / tidak valid"""
+    key = request.headers.get(HEADER) or request.POST.get(FIELD_NAME)
+    if key and KEY_PATTERN.match(key):
+        return key
+    return None
+
+
+def purge_expired():
+    from .models import IdempotencyKey
+    return IdempotencyKey.objects.filter(created_at__lt=timezone.now() - KEY_TTL).delete()[0]
+
+
+def _maybe_purge():
+    with _purge_lock:
+        now = time.monotonic()
+        due = now - _purge['purged_at'] >= PURGE_INTERVAL
+        if due:
+            _purge['purged_at'] = now
+    if due:
+        purge_expired()
+
+
+def _is_stale(record, now):
+    if record.created_at < now - KEY_TTL:
+        return True
+    return record.status_code is None and record.created_at < now - PENDING_TIMEOUT
+
+
+def _claim(user, scope, key):
+    """(record, True) jika key baru diklaim request ini, (record yang sudah ada, False) jika tidak"""
+    from .models import IdempotencyKey
+
+    for _ in range(3):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user=user, scope=scope, key=key), True
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(user=user, scope=scope, key=key).first()
+            if record is None:
+                # Baru saja dilepas request lain, coba klaim lagi
+                continue
+            if _is_stale(record, timezone.now()):
+                IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).delete()
+                continue
+            return record, False
+    raise IntegrityError(f'Idempotency key {key} tidak bisa diklaim')
+
+
+def _wait_for_result(record):
+    """Tunggu request pertama menyimpan hasilnya; None jika belum selesai / sudah dilepas"""
+    from .models import IdempotencyKey
+
+    deadline = time.monotonic() + REPLAY_WAIT
+    while record is not None and record.status_code is None and time.monotonic() < deadline:
+        time.sleep(REPLAY_POLL_INTERVAL)
+        record = IdempotencyKey.objects.filter(pk=record.pk).first()
+    return record
+
+
+def _has_error_messages(request):
+    storage = getattr(request, '_messages', None)
+    return any(message.level >= messages.ERROR for message in getattr(storage, '_queued_messages', []))
+
+
+def _replay(request, record):
+    messages.info(request, 'Permintaan ini sudah diproses sebelumnya')
+    response = HttpResponse(status=record.status_code)
+    response['Location'] = record.location
+    return response
+
+
+def idempotent(view):
+    """Decorator view POST: request dengan idempotency key yang sama hanya diproses sekali per user"""
+    scope = f'{view.__module__}.{view.__name__}'
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'POST' or not request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        key = request_key(request)
+        if key is None:
+            return view(request, *args, **kwargs)
+
+        _maybe_purge()
+        record, claimed = _claim(request.user, scope, key)
+        if not claimed:
+            record = _wait_for_result(record)
+            if record is not None and record.status_code is not None:
+                return _replay(request, record)
+            return HttpResponse(
+                'Permintaan yang sama masih diproses. Muat ulang halaman beberapa saat lagi.',
+                status=409, content_type='text/plain; charset=utf-8',
+            )
+
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        succeeded = 300 <= response.status_code < 400 and response.has_header('Location')
+        if succeeded and not _has_error_messages(request):
+            record.status_code = response.status_code
+            record.location = response['Location'][:500]
+            record.save(update_fields=['status_code', 'location'])
+        else:
+            record.delete()
+        return response
+
+    return wrapper
@@ -0,0 +1,172 @@
+"""Generator ID berurutan waktu untuk nomor order & tiket.
+
+time_ordered_id() menghasilkan ID gaya Snowflake 64-bit:
+
+    41 bit milidetik sejak EPOCH | 10 bit worker | 12 bit urutan dalam milidetik
+
+ditulis sebagai 13 karakter base32 Crockford dengan lebar tetap, sehingga urutan
+string sama dengan urutan waktu. Insert ke index unique selalu menambah di ujung
+B-tree, dan ID tidak pernah bentrok tanpa perlu retry:
+
+- nomor worker disewa dari database (tabel worker_leases) oleh setiap proses
+  dan diperpanjang selama proses hidup. Sewa proses yang mati kedaluwarsa
+  setelah LEASE_TTL lalu dipakai proses baru, jadi dua worker gunicorn yang
+  hidup bersamaan tidak pernah memakai nomor yang sama berapa kali pun proses
+  di-restart. Sewa ditulis lewat koneksi database terpisah (LEASE_DB) yang
+  commit sendiri, jadi rollback transaksi pemanggil (misalnya create_order)
+  tidak ikut membatalkan sewa yang sedang dipakai;
+- dalam satu proses, urutan 12 bit membedakan ID di milidetik yang sama. Jika
+  habis, atau jam sistem mundur, ID memakai milidetik berikutnya (jam logis)
+  sehingga tetap monoton tanpa menunggu.
+
+next_value() adalah fallback berbasis database untuk nomor yang harus berurutan
+rapat dan mudah dibaca manusia (misalnya nomor tiket harian).
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from datetime import timedelta
+import os
+import socket
+import threading
+import time
+import uuid
+
+# 2024-01-01 00:00:00 UTC; 41 bit milidetik cukup sampai sekitar tahun 2093
+EPOCH_MS = 1704067200000
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+WORKER_MASK = (1 << WORKER_BITS) - 1
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+
+# Alias koneksi untuk tabel worker_leases (config.settings.DATABASES['ids'])
+LEASE_DB = 'ids'
+
+# Sewa nomor worker; diperpanjang setelah separuh masa sewa lewat
+LEASE_TTL = timedelta(minutes=10)
+LEASE_RENEW_AFTER = LEASE_TTL.total_seconds() / 2
+
+# Alfabet base32 Crockford (tanpa I, L, O, U) sudah urut ASCII
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+ID_LENGTH = 13
+
+_lock = threading.Lock()
+_state = {
+    'pid': None,
+    'worker': None,
+    'owner': None,
+    'renew_at': 0.0,
+    'last_ms': 0,
+    'sequence': 0,
+}
+
+
+def next_value(name, initial=0):
+    """Nilai berikutnya dari sequence `name` di database.
+
+    Row sequence dikunci sampai transaksi pemanggil selesai, jadi nilai tidak
+    pernah dibagikan dua kali. `initial` (nilai atau callable) hanya dipakai saat
+    sequence pertama kali dibuat.
+    """
+    from .models import Sequence
+
+    with transaction.atomic():
+        sequence, _ = Sequence.objects.select_for_update().get_or_create(name=name, defaults={'value': initial})
+        sequence.value += 1
+        sequence.save(update_fields=['value', 'updated_at'])
+    return sequence.value
+
+
+def _claim_worker(owner):
+    """Sewa nomor worker yang bebas (belum pernah dipakai atau sewanya kedaluwarsa)"""
+    from .models import WorkerLease
+
+    leases = WorkerLease.objects.using(LEASE_DB)
+    for _ in range(3):
+        now = timezone.now()
+        try:
+            # Transaksi terluar di koneksi LEASE_DB: setiap percobaan membaca snapshot baru
+            with transaction.atomic(using=LEASE_DB):
+                lease = (
+                    leases.select_for_update(skip_locked=True)
+                    .filter(expires_at__lte=now).order_by('expires_at').first()
+                )
+                if lease is not None:
+                    lease.owner, lease.expires_at = owner, now + LEASE_TTL
+                    lease.save(using=LEASE_DB, update_fields=['owner', 'expires_at'])
+                    return lease.worker
+                used = set(leases.values_list('worker', flat=True))
+                worker = next((n for n in range(WORKER_MASK + 1) if n not in used), None)
+                if worker is None:
+                    raise RuntimeError('Semua nomor worker sedang disewa')
+                leases.create(worker=worker, owner=owner, expires_at=now + LEASE_TTL)
+                return worker
+        except IntegrityError:
+            # Nomor yang sama baru saja diambil proses lain, coba lagi
+            continue
+    raise RuntimeError('Nomor worker tidak bisa disewa')
+
+
+def _renew_worker(worker, owner):
+    """Perpanjang sewa; False jika sewa sudah diambil proses lain"""
+    from .models import WorkerLease
+
+    return WorkerLease.objects.using(LEASE_DB).filter(worker=worker, owner=owner).update(
+        expires_at=timezone.now() + LEASE_TTL,
+    ) == 1
+
+
+def _worker_id():
+    # Proses hasil fork (worker gunicorn) wajib menyewa nomor worker sendiri
+    pid = os.getpid()
+    if _state['pid'] != pid:
+        _state['owner'] = f'{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}'
+        _state['worker'] = _claim_worker(_state['owner'])
+        _state['pid'] = pid
+        _state['last_ms'] = 0
+        _state['sequence'] = 0
+        _state['renew_at'] = time.monotonic() + LEASE_RENEW_AFTER
+    elif time.monotonic() >= _state['renew_at']:
+        if not _renew_worker(_state['worker'], _state['owner']):
+            # Proses sempat terhenti melewati masa sewa dan nomornya dipakai proses lain
+            _state['worker'] = _claim_worker(_state['owner'])
+            # ID berikutnya pindah ke milidetik baru agar tetap monoton dengan nomor worker baru
+            _state['sequence'] = SEQUENCE_MASK
+        _state['renew_at'] = time.monotonic() + LEASE_RENEW_AFTER
+    return _state['worker']
+
+
+def snowflake():
+    """ID 64-bit (int) yang naik monoton dalam proses ini dan unik antar worker"""
+    with _lock:
+        worker = _worker_id()
+        now = time.time_ns() // 1_000_000 - EPOCH_MS
+        if now > _state['last_ms']:
+            _state['last_ms'] = now
+            _state['sequence'] = 0
+        else:
+            _state['sequence'] = (_state['sequence'] + 1) & SEQUENCE_MASK
+            if _state['sequence'] == 0:
+                _state['last_ms'] += 1
+        return (_state['last_ms'] << (WORKER_BITS + SEQUENCE_BITS)) | (worker << SEQUENCE_BITS) | _state['sequence']
+
+
+def encode(value, length=ID_LENGTH):
+    """Base32 Crockford lebar tetap; urutan string sama dengan urutan angka"""
+    chars = []
+    for _ in range(length):
+        value, remainder = divmod(value, 32)
+        chars.append(ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
+
+def time_ordered_id(prefix=''):
+    return prefix + encode(snowflake())
+
+
+def created_at_ms(identifier, prefix=''):
+    """Waktu pembuatan (epoch milidetik) dari ID time_ordered_id()"""
+    value = 0
+    for char in identifier[len(prefix):]:
+        value = value * 32 + ALPHABET.index(char)
+    return (value >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS
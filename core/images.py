@@ -0,0 +1,204 @@
+"""Pipeline derivative gambar upload (thumb/card/full, WebP + JPEG fallback).
+
+File asli (sampai 5 MB) tetap disimpan apa adanya. Setelah transaksi commit,
+derivative ukuran tetap dibuat di thread background lalu path-nya dicatat di
+field JSON `image_derivatives` pada model:
+
+    {'<nama field>': {'source': '<nama file asli>',
+                      'sizes': {'thumb': {'width': 160, 'webp': '...', 'jpeg': '...'}, ...}}}
+
+Template memakai tag {% responsive_image %} (core.templatetags.image_tags) untuk
+menghasilkan <picture> dengan srcset. Selama derivative belum ada, file asli
+yang dipakai.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.dispatch import Signal
+from io import BytesIO
+from PIL import Image, ImageOps
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Sisi terpanjang (px) per ukuran derivative; gambar kecil tidak diperbesar
+DERIVATIVE_SIZES = {
+    'thumb': 160,
+    'card': 480,
+    'full': 1280,
+}
+
+SAVE_OPTIONS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+DERIVATIVES_DIR = 'derivatives'
+
+# Model (app_label.Model) -> field gambar yang dibuatkan derivative
+IMAGE_FIELDS = {
+    'partners.LaundryImage': ['image'],
+    'orders.Review': ['photo1', 'photo2', 'photo3'],
+    'accounts.User': ['profile_picture'],
+    'partners.MitraVerification': [
+        'ktp_image', 'selfie_with_ktp', 'store_front_photo', 'store_interior_photo',
+        'equipment_photo', 'bank_account_proof',
+    ],
+}
+
+# Dikirim setelah derivative sebuah instance tersimpan (sender=model, instance=...),
+# misalnya untuk membuang fragment HTML ter-cache yang masih memakai file asli
+derivatives_ready = Signal()
+
+# Satu worker cukup: pekerjaan ringan dan tidak boleh berebut CPU dengan request
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-derivatives')
+
+
+def derivative_name(source_name, size, fmt):
+    root, _ = os.path.splitext(source_name)
+    return f'{DERIVATIVES_DIR}/{root}-{size}.{"jpg" if fmt == "jpeg" else fmt}'
+
+
+def build_derivatives(field_file, force=False):
+    """Buat semua derivative untuk satu file gambar; kembalikan entry untuk image_derivatives"""
+    storage = field_file.storage
+    # Sumber content-addressed: isi sama berarti derivative sama, yang sudah ada dipakai ulang
+    reuse = getattr(storage, 'content_addressed', False) and not force
+    with field_file.open('rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    sizes = {}
+    for size, max_side in DERIVATIVE_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((max_side, max_side), Image.LANCZOS)
+        entry = {'width': resized.width}
+        for fmt, (pil_format, options) in SAVE_OPTIONS.items():
+            name = derivative_name(field_file.name, size, fmt)
+            if storage.exists(name):
+                if reuse:
+                    entry[fmt] = name
+                    continue
+                storage.delete(name)
+            output = resized
+            if pil_format == 'JPEG' and output.mode == 'RGBA':
+                # JPEG tidak punya alpha: tempel di atas latar putih
+                background = Image.new('RGB', output.size, (255, 255, 255))
+                background.paste(output, mask=output.getchannel('A'))
+                output = background
+            buffer = BytesIO()
+            output.save(buffer, pil_format, **options)
+            entry[fmt] = storage.save(name, ContentFile(buffer.getvalue()))
+        sizes[size] = entry
+    return {'source': field_file.name, 'sizes': sizes}
+
+
+def delete_derivatives(entry, storage):
+    for sizes in entry.get('sizes', {}).values():
+        for fmt in SAVE_OPTIONS:
+            if sizes.get(fmt):
+                storage.delete(sizes[fmt])
+
+
+def delete_source_derivatives(source_name, storage):
+    """Hapus semua derivative milik file sumber `source_name`"""
+    for size in DERIVATIVE_SIZES:
+        for fmt in SAVE_OPTIONS:
+            storage.delete(derivative_name(source_name, size, fmt))
+
+
+def pending_fields(instance):
+    """Field gambar yang derivative-nya belum sesuai dengan file saat ini"""
+    recorded = instance.image_derivatives or {}
+    pending = []
+    for field in IMAGE_FIELDS[instance._meta.label]:
+        name = getattr(instance, field).name or None
+        if name != recorded.get(field, {}).get('source'):
+            pending.append(field)
+    return pending
+
+
+def process_instance(instance, force=False):
+    """Buat/hapus derivative untuk instance lalu simpan path-nya. Mengembalikan jumlah field yang diproses."""
+    fields = IMAGE_FIELDS[instance._meta.label] if force else pending_fields(instance)
+    if not fields:
+        return 0
+
+    derivatives = dict(instance.image_derivatives or {})
+    for field in fields:
+        field_file = getattr(instance, field)
+        old = derivatives.pop(field, None)
+        # Sumber content-addressed bisa dipakai instance lain; derivative-nya
+        # dihapus core.signals saat file sumber benar-benar dilepas
+        content_addressed = getattr(field_file.storage, 'content_addressed', False)
+        if old and old.get('source') != field_file.name and not content_addressed:
+            delete_derivatives(old, field_file.storage)
+        if field_file:
+            try:
+                derivatives[field] = build_derivatives(field_file, force)
+            except (OSError, Image.DecompressionBombError) as e:
+                # File rusak/bukan gambar: dicatat tanpa ukuran agar tidak diproses ulang,
+                # template tetap memakai file asli
+                logger.warning('Derivative %s.%s #%s gagal: %s', instance._meta.label, field, instance.pk, e)
+                derivatives[field] = {'source': field_file.name, 'sizes': {}}
+
+    # update() agar tidak memicu signal post_save lagi
+    type(instance)._default_manager.filter(pk=instance.pk).update(image_derivatives=derivatives)
+    instance.image_derivatives = derivatives
+    derivatives_ready.send(sender=type(instance), instance=instance)
+    return len(fields)
+
+
+def _process_in_background(label, pk):
+    try:
+        instance = apps.get_model(label)._default_manager.filter(pk=pk).first()
+        if instance is not None:
+            process_instance(instance)
+    except Exception:
+        logger.exception('Gagal membuat derivative gambar %s #%s', label, pk)
+    finally:
+        # Koneksi database milik thread worker, bukan milik request
+        connections.close_all()
+
+
+def schedule(instance):
+    """Proses derivative di background setelah transaksi yang menyimpan instance commit"""
+    if pending_fields(instance):
+        label, pk = instance._meta.label, instance.pk
+        transaction.on_commit(lambda: _executor.submit(_process_in_background, label, pk))
+
+
+def _entry(instance, field):
+    entry = (instance.image_derivatives or {}).get(field)
+    if not entry or not entry['sizes'] or entry['source'] != getattr(instance, field).name:
+        return None
+    return entry
+
+
+def url_for(instance, field, size='full', fmt='jpeg'):
+    """URL derivative, atau URL file asli jika derivative belum dibuat"""
+    field_file = getattr(instance, field)
+    entry = _entry(instance, field)
+    if entry is None:
+        return field_file.url
+    return field_file.storage.url(entry['sizes'][size][fmt])
+
+
+def srcsets(instance, field):
+    """{'webp': srcset, 'jpeg': srcset} untuk field gambar, atau None jika belum ada derivative"""
+    entry = _entry(instance, field)
+    if entry is None:
+        return None
+    storage = getattr(instance, field).storage
+    result = {}
+    for fmt in SAVE_OPTIONS:
+        # Gambar kecil bisa menghasilkan lebar yang sama untuk beberapa ukuran
+        by_width = {sizes['width']: storage.url(sizes[fmt]) for sizes in entry['sizes'].values()}
+        result[fmt] = ', '.join(f'{url} {width}w' for width, url in sorted(by_width.items()))
+    return result
@@ -0,0 +1,22 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from core import images
+
+
+class Command(BaseCommand):
+    help = 'Buat derivative gambar (thumb/card/full, WebP + JPEG) untuk file yang belum diproses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=sorted(images.IMAGE_FIELDS),
+                            help='Hanya proses satu model (mis. partners.LaundryImage)')
+        parser.add_argument('--force', action='store_true', help='Buat ulang derivative yang sudah ada')
+
+    def handle(self, *args, **options):
+        labels = [options['model']] if options['model'] else list(images.IMAGE_FIELDS)
+        for label in labels:
+            model = apps.get_model(label)
+            fields = images.IMAGE_FIELDS[label]
+            processed = 0
+            for instance in model._default_manager.only('pk', 'image_derivatives', *fields).iterator(chunk_size=200):
+                processed += images.process_instance(instance, force=options['force'])
+            self.stdout.write(self.style.SUCCESS(f'{label}: {processed} file diproses'))
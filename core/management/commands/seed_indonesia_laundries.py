@@ -251,8 +251,6 @@ class Command(BaseCommand):
                     'price_per_kg': data['price_per_kg'],
                     'min_order_kg': Decimal('2.0'),
                     'estimated_pickup_time': random.randint(30, 90),
-                    'rating': round(random.uniform(4.2, 5.0), 1),
-                    'total_reviews': random.randint(50, 500),
                     'total_orders_completed': random.randint(100, 1000),
                     'is_active': True,
                     'map_link': data['map_link'],
@@ -198,8 +198,6 @@ class Command(BaseCommand):
                     'operating_hours_end': '20:00',
                     'estimated_pickup_time': random.randint(30, 90),
                     'estimated_delivery_time': random.randint(1200, 2880),  # 20-48 jam
-                    'rating': Decimal(str(round(random.uniform(4.2, 5.0), 1))),
-                    'total_reviews': random.randint(50, 300),
                     'total_orders_completed': random.randint(100, 800),
                     'is_active': True,
                     'is_open_now': True,
@@ -1,3 +1,71 @@
 from django.db import models
+from django.conf import settings
 
-# Create your models here.
+
+class StoredFile(models.Model):
+    """File media content-addressed (core.storage): satu baris per isi file unik"""
+    name = models.CharField(max_length=255, unique=True, verbose_name='Path di Storage')
+    size = models.PositiveBigIntegerField(default=0)
+    # Jumlah referensi dari field model; file dihapus saat kembali ke 0
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} ref)"
+
+    class Meta:
+        db_table = 'stored_files'
+        verbose_name = 'Stored File'
+        verbose_name_plural = 'Stored Files'
+
+
+class Sequence(models.Model):
+    """Counter bernama di database (core.ids.next_value), aman dipakai banyak worker sekaligus"""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+    class Meta:
+        db_table = 'sequences'
+        verbose_name = 'Sequence'
+        verbose_name_plural = 'Sequences'
+
+
+class IdempotencyKey(models.Model):
+    """Hasil POST per idempotency key (core.idempotency), untuk membalas ulang submit ganda"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='idempotency_keys')
+    scope = models.CharField(max_length=100)
+    key = models.CharField(max_length=100)
+    # Kosong selama request pertama masih diproses
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    location = models.CharField(max_length=500, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.scope} {self.key} ({self.status_code or 'diproses'})"
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='idempotency_key_uniq'),
+        ]
+
+
+class WorkerLease(models.Model):
+    """Nomor worker core.ids yang sedang dipakai satu proses, berlaku sampai expires_at"""
+    worker = models.PositiveSmallIntegerField(unique=True)
+    owner = models.CharField(max_length=100)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"worker {self.worker} ({self.owner})"
+
+    class Meta:
+        db_table = 'worker_leases'
+        verbose_name = 'Worker Lease'
+        verbose_name_plural = 'Worker Leases'
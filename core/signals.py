@@ -0,0 +1,67 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from . import images
+from .storage import content_addressed_fields
+
+
+def schedule_image_derivatives(sender, instance, **kwargs):
+    """Buat derivative gambar di background jika ada file gambar baru"""
+    images.schedule(instance)
+
+
+for label in images.IMAGE_FIELDS:
+    post_save.connect(
+        schedule_image_derivatives,
+        sender=apps.get_model(label),
+        dispatch_uid=f'image_derivatives_{label}',
+    )
+
+
+def _release_after_commit(model, field_name, name):
+    """Lepas referensi file content-addressed setelah transaksi yang melepasnya commit"""
+    field = model._meta.get_field(field_name)
+
+    def release():
+        if field.storage.release(name) and model._meta.label in images.IMAGE_FIELDS:
+            images.delete_source_derivatives(name, field.storage)
+
+    transaction.on_commit(release)
+
+
+def remember_stored_files(sender, instance, update_fields=None, **kwargs):
+    """Simpan nama file yang tersimpan di database sebelum save, untuk melepas file yang diganti"""
+    fields = content_addressed_fields(sender)
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+    instance._stored_file_names = {}
+    # File yang belum di-commit akan disimpan ulang oleh save ini (storage menambah satu referensi)
+    instance._uploaded_file_fields = {
+        field for field in fields
+        if getattr(instance, field) and not getattr(instance, field)._committed
+    }
+    if instance.pk is not None and fields:
+        instance._stored_file_names = sender._default_manager.filter(pk=instance.pk).values(*fields).first() or {}
+
+
+def release_replaced_files(sender, instance, **kwargs):
+    uploaded = getattr(instance, '_uploaded_file_fields', set())
+    for field, old_name in getattr(instance, '_stored_file_names', {}).items():
+        # Upload ulang isi yang sama menghasilkan nama yang sama, tetapi tetap menambah referensi baru
+        if old_name and (old_name != getattr(instance, field).name or field in uploaded):
+            _release_after_commit(sender, field, old_name)
+
+
+def release_deleted_files(sender, instance, **kwargs):
+    for field in content_addressed_fields(sender):
+        name = getattr(instance, field).name
+        if name:
+            _release_after_commit(sender, field, name)
+
+
+for model in apps.get_models():
+    if content_addressed_fields(model):
+        label = model._meta.label
+        pre_save.connect(remember_stored_files, sender=model, dispatch_uid=f'stored_files_pre_{label}')
+        post_save.connect(release_replaced_files, sender=model, dispatch_uid=f'stored_files_post_{label}')
+        post_delete.connect(release_deleted_files, sender=model, dispatch_uid=f'stored_files_delete_{label}')
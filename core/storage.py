@@ -0,0 +1,88 @@
+"""Storage content-addressed untuk media yang sering di-upload ulang.
+
+File disimpan sekali per isi di '<folder upload>/<2 hex pertama>/<sha256><ext>',
+misalnya 'payment_proofs/3f/3f9a...c1.jpg'. Upload ulang file yang sama (foto
+toko yang sama, screenshot bukti bayar yang dikirim lagi setelah ditolak) hanya
+menambah referensi, tidak menulis file baru.
+
+Referensi dihitung di tabel stored_files (core.models.StoredFile): setiap save()
+menambah ref_count, dan core.signals memanggil release() saat instance dihapus
+atau field-nya diganti. File fisik dihapus ketika ref_count kembali ke 0.
+"""
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+from .images import DERIVATIVES_DIR
+import hashlib
+import os
+import posixpath
+
+
+def content_name(name, content):
+    """(path content-addressed, ukuran) untuk file `content` yang di-upload sebagai `name`"""
+    digest = hashlib.sha256()
+    size = 0
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    content.seek(0)
+
+    digest = digest.hexdigest()
+    folder = name.replace('\\', '/').split('/')[0] if '/' in name else ''
+    extension = os.path.splitext(name)[1].lower()
+    return posixpath.join(folder, digest[:2], digest + extension), size
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    content_addressed = True
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        if name.startswith(DERIVATIVES_DIR + '/'):
+            # Derivative core.images diberi nama dari file sumbernya (yang sudah content-addressed)
+            return super().save(name, content, max_length)
+
+        from .models import StoredFile
+
+        name, size = content_name(name, content)
+        with transaction.atomic():
+            # Row dikunci agar release() paralel tidak menghapus file yang sedang dipakai lagi
+            stored, _ = StoredFile.objects.select_for_update().get_or_create(name=name, defaults={'size': size})
+            if not self.exists(name):
+                self._save(name, content)
+            StoredFile.objects.filter(pk=stored.pk).update(ref_count=F('ref_count') + 1)
+        return name
+
+    def release(self, name):
+        """Lepas satu referensi ke `name`; True jika file ikut dihapus karena tidak dipakai lagi"""
+        from .models import StoredFile
+
+        with transaction.atomic():
+            stored = StoredFile.objects.select_for_update().filter(name=name).first()
+            if stored is None:
+                # File dari sebelum storage ini dipakai tidak dihitung, dibiarkan
+                return False
+            if stored.ref_count > 1:
+                StoredFile.objects.filter(pk=stored.pk).update(ref_count=F('ref_count') - 1)
+                return False
+            stored.delete()
+            self.delete(name)
+        return True
+
+
+content_addressed_storage = ContentAddressedStorage()
+
+
+def content_addressed_fields(model):
+    """Nama field file milik `model` yang memakai storage content-addressed"""
+    return [
+        field.name for field in model._meta.concrete_fields
+        if getattr(getattr(field, 'storage', None), 'content_addressed', False)
+    ]
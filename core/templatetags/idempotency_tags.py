@@ -0,0 +1,11 @@
+from django import template
+from django.utils.html import format_html
+from core import idempotency
+
+register = template.Library()
+
+
+@register.simple_tag
+def idempotency_key_field():
+    """Hidden input berisi idempotency key baru untuk form POST yang tidak boleh diproses dua kali"""
+    return format_html('<input type="hidden" name="{}" value="{}">', idempotency.FIELD_NAME, idempotency.new_key())
@@ -0,0 +1,32 @@
+from django import template
+from django.utils.html import format_html
+from core import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(instance, field, size='card', sizes='100vw', alt='', css_class='', lazy=True):
+    """<picture> WebP + JPEG (srcset thumb/card/full) untuk field gambar; file asli jika belum diproses"""
+    field_file = getattr(instance, field)
+    loading = 'lazy' if lazy else 'eager'
+    srcsets = images.srcsets(instance, field)
+    if srcsets is None:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}">',
+            field_file.url, alt, css_class, loading,
+        )
+    return format_html(
+        '<picture style="display: contents;">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="{}">'
+        '</picture>',
+        srcsets['webp'], sizes,
+        images.url_for(instance, field, size), srcsets['jpeg'], sizes, alt, css_class, loading,
+    )
+
+
+@register.simple_tag
+def image_url(instance, field, size='full', fmt='jpeg'):
+    """URL satu derivative (untuk atribut data-* / JavaScript)"""
+    return images.url_for(instance, field, size, fmt)
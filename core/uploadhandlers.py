@@ -0,0 +1,105 @@
+"""Upload handler gambar yang menolak file sejak chunk pertama.
+
+ImageUploadHandler dipasang paling depan di FILE_UPLOAD_HANDLERS. Untuk field
+yang terdaftar di UPLOAD_LIMITS, handler ini:
+
+- mengecek magic bytes di chunk pertama (JPEG, PNG, WEBP) alih-alih percaya
+  content type dari browser, dan
+- menghitung ukuran selama streaming lalu berhenti begitu batas field terlewati.
+
+File yang ditolak di-skip (SkipFile) sebelum chunk berikutnya diteruskan ke
+handler memory/temporary di belakangnya, jadi tidak ditulis ke memori atau file
+sementara. Alasan penolakan dicatat di request dan dibaca view lewat
+rejected_uploads().
+"""
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+MB = 1024 * 1024
+
+MAX_IMAGE_SIZE = 5 * MB
+
+# Field upload gambar -> ukuran maksimum (byte). Field lain tidak disentuh.
+UPLOAD_LIMITS = {
+    # partners: galeri laundry & verifikasi mitra
+    'images': MAX_IMAGE_SIZE,
+    'ktp_image': MAX_IMAGE_SIZE,
+    'selfie_with_ktp': MAX_IMAGE_SIZE,
+    'store_front_photo': MAX_IMAGE_SIZE,
+    'store_interior_photo': MAX_IMAGE_SIZE,
+    'equipment_photo': MAX_IMAGE_SIZE,
+    'bank_account_proof': MAX_IMAGE_SIZE,
+    # orders: bukti bayar, foto ulasan, screenshot laporan
+    'proof_image': MAX_IMAGE_SIZE,
+    'photo1': MAX_IMAGE_SIZE,
+    'photo2': MAX_IMAGE_SIZE,
+    'photo3': MAX_IMAGE_SIZE,
+    'screenshot': MAX_IMAGE_SIZE,
+    # accounts: foto profil
+    'profile_picture': MAX_IMAGE_SIZE,
+}
+
+# Byte yang dibutuhkan untuk mengenali semua format di bawah
+SNIFF_LENGTH = 12
+
+
+def sniff_image_type(header):
+    """Content type gambar dari byte awal file, atau None jika bukan JPG/PNG/WEBP"""
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def _size_label(limit):
+    return f'{limit // MB}MB'
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """Validasi gambar secara streaming sebelum handler penyimpan menerima data"""
+
+    def new_file(self, field_name, file_name, content_type, content_length, *args, **kwargs):
+        super().new_file(field_name, file_name, content_type, content_length, *args, **kwargs)
+        self.limit = UPLOAD_LIMITS.get(field_name)
+        self.received = 0
+        # Jangan SkipFile di sini: handler berikutnya belum membuka file part ini, dan
+        # parser akan menutup file part sebelumnya (yang sudah diterima). Ditolak di chunk pertama.
+        self.declared_too_large = (
+            self.limit is not None and content_length is not None and content_length > self.limit
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.limit is None:
+            return raw_data
+
+        if start == 0:
+            if self.declared_too_large:
+                self._reject(f'{self.file_name} terlalu besar (maksimal {_size_label(self.limit)})')
+            if sniff_image_type(raw_data[:SNIFF_LENGTH]) is None:
+                self._reject(f'{self.file_name} bukan gambar. Gunakan JPG, PNG, atau WEBP')
+
+        self.received += len(raw_data)
+        if self.received > self.limit:
+            self._reject(f'{self.file_name} terlalu besar (maksimal {_size_label(self.limit)})')
+        return raw_data
+
+    def file_complete(self, file_size):
+        # File dibuat oleh handler berikutnya (memory/temporary)
+        return None
+
+    def _reject(self, message):
+        if self.request is not None:
+            if not hasattr(self.request, '_rejected_uploads'):
+                self.request._rejected_uploads = []
+            self.request._rejected_uploads.append((self.field_name, message))
+        raise SkipFile()
+
+
+def rejected_uploads(request, field_name=None):
+    """Pesan penolakan upload untuk request ini (semua field, atau satu field)"""
+    # Akses FILES memastikan body multipart sudah di-parse
+    request.FILES
+    rejected = getattr(request, '_rejected_uploads', [])
+    return [message for field, message in rejected if field_name is None or field == field_name]
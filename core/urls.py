@@ -6,6 +6,7 @@ app_name = 'core'
 urlpatterns = [
     path('', views.home, name='home'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('location/', views.set_user_location, name='set_user_location'),
     path('admin-dashboard/', views.admin_dashboard, name='admin_dashboard'),
     path('mitra-dashboard/', views.mitra_dashboard, name='mitra_dashboard'),
     path('admin/export/orders/excel/', views.export_orders_excel, name='export_orders_excel'),
@@ -3,8 +3,9 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from orders.models import Order, Service
 from partners.models import MitraProfile, Laundry, MitraRequest
+from partners import geo, listing, facets
 from math import radians, sin, cos, sqrt, atan2
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from datetime import datetime, timedelta
 from django.db.models import Sum, Count, Q
 import csv
@@ -29,29 +30,67 @@ def dashboard(request):
     elif user.role == 'mitra':
         return redirect('core:mitra_dashboard')
     else:
-        # Get all active laundries in Yogyakarta
-        laundries = Laundry.objects.filter(is_active=True, city='Yogyakarta').select_related('mitra')
+        # Get all active laundries in the listing city
+        laundries = Laundry.objects.filter(is_active=True, city=listing.DEFAULT_CITY).prefetch_related('images')
         
         # Calculate user order statistics
         user_orders = Order.objects.filter(user=user)
         total_orders = user_orders.count()
         active_orders = user_orders.filter(status__in=['pending', 'picked_up', 'processing', 'ready']).count()
-        nearby_laundries_count = laundries.count()
         
-        # Enrich laundries with additional info
-        for laundry in laundries:
-            # You can add distance calculation here if user location is available
-            # For now, just add a default distance
-            laundry.distance = None
+        # Jika lokasi user sudah diketahui, filter & urutkan jarak di database
+        user_location = geo.user_location_from_session(request.session)
+        if user_location:
+            laundries = laundries.nearby(*user_location)
+            sort = 'distance'
+        else:
+            # Tanpa lokasi: urutan leaderboard yang sudah dihitung (partners.ranking)
+            sort = 'top'
+        # Jumlah per facet: ringkasan kota dari cache, atau satu query aggregate untuk laundry terdekat
+        if user_location:
+            facet_counts = facets.compute_facets(laundries)
+        else:
+            facet_counts = facets.city_facets(listing.DEFAULT_CITY)
+        nearby_laundries_count = facet_counts['total']
+        
+        # Hanya halaman pertama yang dirender; sisanya dimuat bertahap lewat listing API
+        laundries, next_cursor = listing.paginate_laundries(
+            laundries, sort=sort, user_location=user_location, city=listing.DEFAULT_CITY
+        )
         
         context = {
             'laundries': laundries,
             'total_orders': total_orders,
             'active_orders': active_orders,
             'nearby_laundries_count': nearby_laundries_count,
+            'has_user_location': user_location is not None,
+            'listing_sort': sort,
+            'next_cursor': next_cursor,
+            'nearby_radius_km': geo.DEFAULT_NEARBY_RADIUS_KM,
+            'facets': facet_counts,
         }
         return render(request, 'core/user_dashboard_new.html', context)
 
+@login_required
+def set_user_location(request):
+    """Simpan lokasi user (dari geolocation browser) ke session"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Method not allowed'}, status=405)
+    
+    try:
+        data = json.loads(request.body)
+        lat = float(data.get('latitude'))
+        lon = float(data.get('longitude'))
+    except (AttributeError, TypeError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Koordinat tidak valid'}, status=400)
+    
+    if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+        return JsonResponse({'success': False, 'error': 'Koordinat tidak valid'}, status=400)
+    
+    request.session['user_latitude'] = lat
+    request.session['user_longitude'] = lon
+    return JsonResponse({'success': True})
+
 @login_required
 def admin_dashboard(request):
     if request.user.role != 'admin':
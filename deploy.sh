@@ -16,4 +16,16 @@ python manage.py collectstatic --noinput
 echo "Running database migrations..."
 python manage.py migrate --noinput
 
+# Create cache table
+echo "Creating cache table..."
+python manage.py createcachetable
+
+# Generate thumbnail/WebP for uploads that have none yet
+echo "Generating image derivatives..."
+python manage.py generate_image_derivatives
+
+# Perceptual hash for payment proofs uploaded before hashing existed
+echo "Hashing payment proofs..."
+python manage.py hash_payment_proofs
+
 echo "Deployment completed successfully!"
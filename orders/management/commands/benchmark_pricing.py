@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from partners.models import Laundry, Voucher
+from orders import pricing
+import random
+import time
+
+
+class Command(BaseCommand):
+    help = 'Benchmark pricing.quote per penawaran vs batch pricing.quote_many'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help='Jumlah penawaran per percobaan')
+        parser.add_argument('--repeat', type=int, default=3, help='Jumlah pengulangan (ambil yang tercepat)')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        # Voucher in-memory (tidak disimpan ke DB) untuk setiap tipe diskon
+        vouchers = [None] + [
+            Voucher(
+                voucher_type=voucher_type, discount_value=Decimal(value), max_discount=Decimal('15000'),
+                min_order_amount=Decimal('10000'), min_order_kg=Decimal('2'),
+                valid_from=now - timedelta(days=1), valid_until=now + timedelta(days=1),
+            )
+            for voucher_type, value in [
+                ('free_shipping', '0'), ('percentage_discount', '20'),
+                ('fixed_discount', '5000'), ('free_kg', '1'),
+            ]
+        ]
+
+        # Tabel COD dimuat sebelum pengukuran
+        pricing.quote(Laundry(price_per_kg=Decimal('7000')), Decimal('1'), 0)
+        self.stdout.write(f'{"N":>8} {"per-item (ms)":>15} {"batch (ms)":>12} {"speedup":>9} {"us/quote":>10}')
+
+        random.seed(42)
+        for size in options['sizes']:
+            offers = [
+                (
+                    Laundry(price_per_kg=Decimal(random.randrange(5000, 15001, 500))),
+                    Decimal(f'{random.uniform(1, 15):.2f}'),
+                    round(random.uniform(0, 12), 2),
+                    random.choice(vouchers),
+                )
+                for _ in range(size)
+            ]
+
+            per_item = self._best_of(options['repeat'], lambda: [
+                pricing.quote(laundry, weight, distance, voucher)
+                for laundry, weight, distance, voucher in offers
+            ])
+            batch = self._best_of(options['repeat'], lambda: pricing.quote_many(offers))
+
+            self.stdout.write(
+                f'{size:>8} {per_item * 1000:>15.1f} {batch * 1000:>12.1f} {per_item / batch:>8.1f}x'
+                f' {batch / size * 1e6:>10.2f}'
+            )
+
+    @staticmethod
+    def _best_of(repeat, func):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
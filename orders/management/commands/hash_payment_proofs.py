@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from orders import proof_hashes
+from orders.models import Payment
+
+
+class Command(BaseCommand):
+    help = 'Hitung perceptual hash bukti pembayaran yang belum punya hash'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Hitung ulang semua bukti pembayaran')
+
+    def handle(self, *args, **options):
+        payments = Payment.objects.exclude(proof_image='')
+        if not options['force']:
+            payments = payments.filter(proof_phash='')
+
+        batch = []
+        hashed = 0
+        fields = ['proof_phash', *proof_hashes.BAND_FIELDS]
+        for payment in payments.only('pk', 'proof_image').iterator(chunk_size=200):
+            try:
+                with payment.proof_image.open('rb') as proof:
+                    values = proof_hashes.hash_fields(proof)
+            except OSError:
+                # File hilang dari storage
+                continue
+            for field, value in values.items():
+                setattr(payment, field, value)
+            batch.append(payment)
+            hashed += 1
+            if len(batch) >= 200:
+                Payment.objects.bulk_update(batch, fields)
+                batch = []
+        if batch:
+            Payment.objects.bulk_update(batch, fields)
+
+        self.stdout.write(self.style.SUCCESS(f'{hashed} bukti pembayaran di-hash'))
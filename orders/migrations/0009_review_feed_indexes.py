@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_image_derivatives'),
+        ('partners', '0015_image_derivatives'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['laundry', 'is_approved', '-created_at', '-id'], name='review_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['laundry', 'is_approved', '-rating', '-created_at', '-id'], name='review_feed_rating_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:02
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_review_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='proof_phash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='proof_phash_band_0',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='proof_phash_band_1',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='proof_phash_band_2',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='proof_phash_band_3',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='proof_image',
+            field=models.ImageField(storage=core.storage.ContentAddressedStorage(), upload_to='payment_proofs/', verbose_name='Bukti Pembayaran'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_payment_proof_hashes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='service',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='orders', to='orders.service'),
+        ),
+    ]
@@ -1,8 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from partners.models import MitraProfile, Laundry
 from django.core.validators import MinValueValidator, MaxValueValidator
-import uuid
+from core import ids
+from core.storage import content_addressed_storage
 
 class Service(models.Model):
     name = models.CharField(max_length=100)
@@ -21,6 +22,8 @@ class Service(models.Model):
         verbose_name = 'Service'
         verbose_name_plural = 'Services'
 
+ORDER_NUMBER_PREFIX = 'SB'
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Menunggu Penjemputan'),
@@ -44,7 +47,8 @@ class Order(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='orders')
     laundry = models.ForeignKey(Laundry, on_delete=models.PROTECT, related_name='orders', null=True, blank=True)
     mitra = models.ForeignKey(MitraProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='orders')
-    service = models.ForeignKey(Service, on_delete=models.PROTECT, related_name='orders')
+    # Order marketplace dihargai per laundry (price_per_kg), tidak memilih layanan
+    service = models.ForeignKey(Service, on_delete=models.PROTECT, related_name='orders', null=True, blank=True)
     
     # Voucher (jika digunakan)
     voucher = models.ForeignKey('partners.Voucher', on_delete=models.SET_NULL, null=True, blank=True, 
@@ -84,11 +88,12 @@ class Order(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.order_number:
-            self.order_number = f"SB{uuid.uuid4().hex[:8].upper()}"
+            # Urut waktu (append ke index unique), unik antar worker tanpa retry
+            self.order_number = ids.time_ordered_id(ORDER_NUMBER_PREFIX)
         
         # Auto set mitra dari laundry
-        if self.laundry and not self.mitra:
-            self.mitra = self.laundry.mitra
+        if self.laundry_id and not self.mitra_id:
+            self.mitra_id = self.laundry.mitra_id
         
         # Auto calculate total jika belum ada
         if not self.total_price or self.total_price == 0:
@@ -98,33 +103,15 @@ class Order(models.Model):
     
     def calculate_total_price(self):
         """Hitung total harga otomatis"""
-        from partners.models import CODRate
-        
-        # Harga laundry = price_per_kg * weight
-        self.laundry_price = float(self.laundry.price_per_kg) * float(self.weight_kg)
-        
-        # COD fee berdasarkan jarak
-        self.cod_fee = CODRate.get_fee_for_distance(float(self.distance_km))
-        
-        # Platform fee 2.5% - 5% dari laundry price
-        fee_percentage = 0.03  # 3%
-        self.platform_fee = self.laundry_price * fee_percentage
+        from .pricing import quote
         
-        # Subtotal sebelum voucher
-        subtotal = self.laundry_price + self.cod_fee + self.platform_fee
-        
-        # Apply voucher discount
-        if self.voucher and self.voucher.is_valid():
-            self.voucher_discount = self.voucher.calculate_discount(
-                self.laundry_price,
-                float(self.weight_kg),
-                self.cod_fee
-            )
-        else:
-            self.voucher_discount = 0
-        
-        # Total = Subtotal - Voucher Discount
-        self.total_price = subtotal - self.voucher_discount
+        voucher = self.voucher if self.voucher and self.voucher.is_valid() else None
+        prices = quote(self.laundry, self.weight_kg, self.distance_km, voucher)
+        self.laundry_price = prices.laundry_price
+        self.cod_fee = prices.cod_fee
+        self.platform_fee = prices.platform_fee
+        self.voucher_discount = prices.voucher_discount
+        self.total_price = prices.total_price
         
         return self.total_price
     
@@ -201,7 +188,15 @@ class Payment(models.Model):
     order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='payment', verbose_name='Order')
     payment_method = models.CharField(max_length=20, verbose_name='Metode Pembayaran')
     amount = models.DecimalField(max_digits=12, decimal_places=0, verbose_name='Jumlah Pembayaran')
-    proof_image = models.ImageField(upload_to='payment_proofs/', verbose_name='Bukti Pembayaran')
+    proof_image = models.ImageField(upload_to='payment_proofs/', storage=content_addressed_storage,
+                                    verbose_name='Bukti Pembayaran')
+    # Perceptual hash (dHash 64-bit, hex) bukti bayar, dipecah 4 band 16-bit untuk
+    # mencari bukti yang mirip di order lain (orders.proof_hashes)
+    proof_phash = models.CharField(max_length=16, blank=True, default='', editable=False)
+    proof_phash_band_0 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    proof_phash_band_1 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    proof_phash_band_2 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    proof_phash_band_3 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='Status')
     verified_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, 
@@ -222,6 +217,13 @@ class Payment(models.Model):
         ordering = ['-uploaded_at']
 
 
+def _last_ticket_number(prefix):
+    """Nomor tiket terakhir berawalan `prefix` (hanya saat sequence hari itu baru dibuat)"""
+    last_ticket = PaymentIssue.objects.filter(
+        ticket_number__startswith=prefix
+    ).order_by('-ticket_number').values_list('ticket_number', flat=True).first()
+    return int(last_ticket.split('-')[-1]) if last_ticket else 0
+
 class PaymentIssue(models.Model):
     """Customer Service - Payment Issues / Kendala Pembayaran"""
     ISSUE_TYPE_CHOICES = [
@@ -267,20 +269,15 @@ class PaymentIssue(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.ticket_number:
-            # Generate ticket number: CS-YYYYMMDD-XXXX
+            # Generate ticket number: CS-YYYYMMDD-XXXX dari sequence harian di database
             from django.utils import timezone
             date_str = timezone.now().strftime('%Y%m%d')
-            last_ticket = PaymentIssue.objects.filter(
-                ticket_number__startswith=f'CS-{date_str}'
-            ).order_by('-ticket_number').first()
-            
-            if last_ticket:
-                last_num = int(last_ticket.ticket_number.split('-')[-1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            
-            self.ticket_number = f'CS-{date_str}-{new_num:04d}'
+            prefix = f'CS-{date_str}-'
+            new_num = ids.next_value(
+                f'payment_issue_ticket:{date_str}',
+                initial=lambda: _last_ticket_number(prefix),
+            )
+            self.ticket_number = f'{prefix}{new_num:04d}'
         
         super().save(*args, **kwargs)
     
@@ -331,6 +328,8 @@ class Review(models.Model):
     photo1 = models.ImageField(upload_to='reviews/', null=True, blank=True, verbose_name='Foto 1')
     photo2 = models.ImageField(upload_to='reviews/', null=True, blank=True, verbose_name='Foto 2')
     photo3 = models.ImageField(upload_to='reviews/', null=True, blank=True, verbose_name='Foto 3')
+    # Path thumbnail/WebP hasil core.images
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     
     # Admin moderation
     is_approved = models.BooleanField(default=True, verbose_name='Disetujui')
@@ -339,19 +338,21 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Dibuat')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Diupdate')
     
-    def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
-        
-        # Update laundry rating setelah review disimpan
-        if is_new or self.is_approved:
-            self.laundry.update_rating()
-    
     def __str__(self):
         return f"Review by {self.user.username} for {self.laundry.name} - {self.rating}★"
     
+    def save(self, *args, **kwargs):
+        # State lama dikunci di pre_save (orders.signals) sampai histogram selesai diupdate di post_save
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
     class Meta:
         db_table = 'reviews'
         verbose_name = 'Review'
         verbose_name_plural = 'Reviews'
         ordering = ['-created_at']
+        indexes = [
+            # Feed ulasan per laundry (partners.review_feed), terbaru / rating tertinggi
+            models.Index(fields=['laundry', 'is_approved', '-created_at', '-id'], name='review_feed_idx'),
+            models.Index(fields=['laundry', 'is_approved', '-rating', '-created_at', '-id'], name='review_feed_rating_idx'),
+        ]
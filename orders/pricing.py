@@ -0,0 +1,94 @@
+"""Perhitungan harga order (satu-satunya sumber rumus harga).
+
+Komponen harga, semua Decimal dan dibulatkan ke rupiah:
+
+    laundry_price    = price_per_kg * berat
+    cod_fee          = tarif COD untuk jarak (partners.cod_rates, in-process)
+    platform_fee     = 3% dari laundry_price
+    voucher_discount = diskon voucher, maksimal sebesar subtotal
+    total_price      = laundry_price + cod_fee + platform_fee - voucher_discount
+
+Modul ini murni: tidak ada query database. Validitas voucher (periode, kuota,
+batas per user) dicek pemanggil; di sini voucher hanya dibaca syarat dan
+nilainya. quote_many() menghitung banyak penawaran sekaligus dengan satu
+snapshot tabel COD, jadi listing atau perbandingan harga antar laundry tidak
+menambah query per item.
+"""
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+from partners import cod_rates
+
+PLATFORM_FEE_RATE = Decimal('0.03')
+
+ZERO = Decimal('0')
+HUNDRED = Decimal('100')
+RUPIAH = Decimal('1')
+
+Quote = namedtuple('Quote', ['laundry_price', 'cod_fee', 'platform_fee', 'voucher_discount', 'total_price'])
+
+
+def as_decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def round_rupiah(value):
+    return as_decimal(value).quantize(RUPIAH, ROUND_HALF_UP)
+
+
+def voucher_discount(voucher, price_per_kg, weight_kg, laundry_price, cod_fee):
+    """Diskon (Decimal, belum dibulatkan) dari syarat & nilai voucher; 0 jika syarat tidak terpenuhi"""
+    if laundry_price < voucher.min_order_amount or weight_kg < voucher.min_order_kg:
+        return ZERO
+
+    voucher_type = voucher.voucher_type
+    if voucher_type == 'free_shipping':
+        return cod_fee
+    if voucher_type == 'percentage_discount':
+        discount = laundry_price * voucher.discount_value / HUNDRED
+        if voucher.max_discount:
+            discount = min(discount, voucher.max_discount)
+        return discount
+    if voucher_type == 'fixed_discount':
+        return voucher.discount_value
+    if voucher_type == 'free_kg':
+        # Gratis KG dihitung dari harga per kg laundry
+        return price_per_kg * voucher.discount_value
+    return ZERO
+
+
+def _quote(price_per_kg, weight_kg, cod_fee, voucher):
+    laundry_price = round_rupiah(price_per_kg * weight_kg)
+    cod_fee = round_rupiah(cod_fee)
+    platform_fee = round_rupiah(laundry_price * PLATFORM_FEE_RATE)
+    subtotal = laundry_price + cod_fee + platform_fee
+
+    discount = ZERO
+    if voucher is not None:
+        discount = min(round_rupiah(voucher_discount(voucher, price_per_kg, weight_kg, laundry_price, cod_fee)), subtotal)
+    return Quote(laundry_price, cod_fee, platform_fee, discount, subtotal - discount)
+
+
+def quote_prices(offers):
+    """Seperti quote_many(), tetapi item pertama setiap tuple adalah price_per_kg (bukan laundry)"""
+    cod_fee_for = cod_rates.fee_lookup()
+    return [
+        _quote(as_decimal(price_per_kg), as_decimal(weight_kg), cod_fee_for(distance_km), voucher)
+        for price_per_kg, weight_kg, distance_km, voucher in offers
+    ]
+
+
+def quote_many(offers):
+    """List Quote untuk iterable (laundry, berat kg, jarak km, voucher atau None), urutan sama.
+
+    `laundry` cukup punya atribut price_per_kg (instance Laundry, termasuk yang
+    belum disimpan). Tabel COD dibaca sekali untuk semua penawaran.
+    """
+    return quote_prices(
+        (laundry.price_per_kg, weight_kg, distance_km, voucher)
+        for laundry, weight_kg, distance_km, voucher in offers
+    )
+
+
+def quote(laundry, weight_kg, distance_km, voucher=None):
+    """Quote satu penawaran"""
+    return quote_many([(laundry, weight_kg, distance_km, voucher)])[0]
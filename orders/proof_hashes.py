@@ -0,0 +1,82 @@
+"""Perceptual hash bukti pembayaran untuk menemukan bukti yang dipakai ulang.
+
+Setiap bukti bayar diberi dHash 64-bit: tahan terhadap kompresi ulang, resize
+dan screenshot ulang, sehingga bukti yang "sama" punya hash yang hanya beda
+beberapa bit. Hash dipecah menjadi 4 band 16-bit yang masing-masing di-index.
+Dua hash dengan jarak Hamming <= 3 pasti sama persis di minimal satu band, jadi
+semua kandidat bisa diambil dengan satu query OR antar band, lalu jarak
+sebenarnya dihitung di Python.
+"""
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+HASH_SIZE = 8
+BANDS = 4
+BAND_BITS = HASH_SIZE * HASH_SIZE // BANDS
+
+# Jarak Hamming maksimum yang dianggap bukti yang sama (harus < BANDS agar tidak ada yang terlewat)
+NEAR_DUPLICATE_DISTANCE = BANDS - 1
+
+BAND_FIELDS = [f'proof_phash_band_{band}' for band in range(BANDS)]
+
+
+def dhash(file):
+    """dHash 64-bit (int) dari file gambar"""
+    file.seek(0)
+    with Image.open(file) as image:
+        # JPEG bisa di-decode langsung di resolusi kecil
+        image.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))
+        image = ImageOps.exif_transpose(image).convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+    file.seek(0)
+
+    pixels = list(image.getdata())
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = value << 1 | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def bands(value):
+    mask = (1 << BAND_BITS) - 1
+    return [(value >> (band * BAND_BITS)) & mask for band in range(BANDS)]
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def hash_fields(file):
+    """{field: nilai} perceptual hash untuk Payment, kosong jika file bukan gambar yang bisa dibaca"""
+    try:
+        value = dhash(file)
+    except (OSError, Image.DecompressionBombError):
+        return {'proof_phash': '', **{field: None for field in BAND_FIELDS}}
+    return {'proof_phash': f'{value:016x}', **dict(zip(BAND_FIELDS, bands(value)))}
+
+
+def near_duplicates(payments, max_distance=NEAR_DUPLICATE_DISTANCE):
+    """{payment.id: [Payment order lain dengan bukti mirip]} untuk `payments`, dalam satu query"""
+    from .models import Payment
+
+    hashed = [payment for payment in payments if payment.proof_phash]
+    if not hashed:
+        return {}
+
+    condition = Q()
+    for field in BAND_FIELDS:
+        condition |= Q(**{f'{field}__in': {getattr(payment, field) for payment in hashed}})
+    candidates = list(Payment.objects.filter(condition).exclude(proof_phash='').select_related('order'))
+
+    result = {}
+    for payment in hashed:
+        value = int(payment.proof_phash, 16)
+        matches = [
+            candidate for candidate in candidates
+            if candidate.order_id != payment.order_id
+            and hamming(value, int(candidate.proof_phash, 16)) <= max_distance
+        ]
+        if matches:
+            result[payment.id] = matches
+    return result
@@ -0,0 +1,74 @@
+"""Perbandingan harga semua laundry terdekat untuk satu berat cucian.
+
+Endpoint quote dipanggil setiap slider berat digeser, sedangkan lokasi user
+hampir tidak berubah. Karena itu kandidat laundry (id, nama, harga per kg,
+jarak, estimasi waktu) untuk satu titik lokasi disimpan di cache dengan key
+berisi version listing laundry; setiap perubahan Laundry menaikkan version
+tersebut. Request berikutnya cukup membaca satu entry cache lalu menghitung
+semua harga dengan pricing.quote_prices() di atas tabel COD in-process.
+
+Jarak dihitung persis seperti di create_order (Laundry.with_distance di
+database, titik lokasi tanpa pembulatan), jadi tier COD dan total yang tampil
+sama dengan yang ditagih saat checkout.
+"""
+from django.core.cache import cache
+from core.cache_versions import get_version
+from partners import geo, listing
+from partners.models import Laundry
+from . import pricing
+
+CACHE_TIMEOUT = 60 * 10
+
+MAX_RADIUS_KM = 50
+MAX_RESULTS = 100
+
+OFFER_FIELDS = ('id', 'name', 'price_per_kg', 'estimated_pickup_time', 'estimated_delivery_time')
+
+
+def _cache_key(lat, lon, radius_km):
+    return f'laundry_quotes:{get_version(listing.VERSION_KEY)}:{lat!r}:{lon!r}:{radius_km!r}'
+
+
+def nearby_offers(lat, lon, radius_km=geo.DEFAULT_NEARBY_RADIUS_KM):
+    """Laundry aktif terdekat (maksimal MAX_RESULTS) sebagai dict ringkas, urut jarak"""
+    lat, lon, radius_km = float(lat), float(lon), float(radius_km)
+    key = _cache_key(lat, lon, radius_km)
+    offers = cache.get(key)
+    if offers is None:
+        laundries = Laundry.objects.filter(is_active=True).only(*OFFER_FIELDS).nearby(lat, lon, radius_km)
+        offers = [
+            {
+                'id': laundry.id,
+                'name': laundry.name,
+                'price_per_kg': laundry.price_per_kg,
+                'distance_km': laundry.distance,
+                'eta_minutes': laundry.estimated_pickup_time + laundry.estimated_delivery_time,
+            }
+            for laundry in laundries[:MAX_RESULTS]
+        ]
+        cache.set(key, offers, CACHE_TIMEOUT)
+    return offers
+
+
+def compare(weight_kg, lat, lon, radius_km=geo.DEFAULT_NEARBY_RADIUS_KM):
+    """Harga `weight_kg` di setiap laundry terdekat, urut total termurah lalu terdekat"""
+    offers = nearby_offers(lat, lon, radius_km)
+    weight_kg = pricing.as_decimal(weight_kg)
+    prices = pricing.quote_prices(
+        (offer['price_per_kg'], weight_kg, offer['distance_km'], None) for offer in offers
+    )
+    ranked = sorted(zip(offers, prices), key=lambda pair: (pair[1].total_price, pair[0]['distance_km']))
+    return [
+        {
+            'laundry_id': offer['id'],
+            'name': offer['name'],
+            'distance_km': offer['distance_km'],
+            'eta_minutes': offer['eta_minutes'],
+            'price_per_kg': float(offer['price_per_kg']),
+            'laundry_price': int(quote.laundry_price),
+            'cod_fee': int(quote.cod_fee),
+            'platform_fee': int(quote.platform_fee),
+            'total_price': int(quote.total_price),
+        }
+        for offer, quote in ranked
+    ]
@@ -0,0 +1,53 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from core.images import derivatives_ready
+from partners import rating_stats, detail_cache
+from . import proof_hashes
+from .models import Payment, Review
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_state(sender, instance, **kwargs):
+    """Simpan state review di database sebelum disimpan, untuk menghitung selisih histogram"""
+    instance._stored_rating_state = rating_stats.stored_review_state(instance.pk)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_histogram(sender, instance, **kwargs):
+    """Pindahkan hitungan histogram dari state lama ke state baru review"""
+    new_state = rating_stats.review_state({
+        'laundry_id': instance.laundry_id,
+        'rating': instance.rating,
+        'is_approved': instance.is_approved,
+    })
+    old_state = getattr(instance, '_stored_rating_state', None)
+    rating_stats.apply_change(old_state, new_state)
+    detail_cache.invalidate(instance.laundry_id)
+    if old_state is not None and old_state[0] != instance.laundry_id:
+        detail_cache.invalidate(old_state[0])
+
+
+@receiver(post_delete, sender=Review)
+def remove_from_rating_histogram(sender, instance, **kwargs):
+    old_state = rating_stats.review_state({
+        'laundry_id': instance.laundry_id,
+        'rating': instance.rating,
+        'is_approved': instance.is_approved,
+    })
+    rating_stats.apply_change(old_state, None)
+    detail_cache.invalidate(instance.laundry_id)
+
+
+@receiver(derivatives_ready, sender=Review)
+def refresh_review_photos(sender, instance, **kwargs):
+    """Fragment ulasan dirender ulang agar memakai thumbnail foto review"""
+    detail_cache.invalidate(instance.laundry_id)
+
+
+@receiver(pre_save, sender=Payment)
+def hash_payment_proof(sender, instance, **kwargs):
+    """Hitung perceptual hash saat bukti bayar baru di-upload (file belum disimpan ke storage)"""
+    proof = instance.proof_image
+    if proof and not proof._committed:
+        for field, value in proof_hashes.hash_fields(proof.file).items():
+            setattr(instance, field, value)
@@ -1,3 +1,193 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+from partners import cod_rates
+from partners.models import CODRate, Laundry, MitraProfile, Voucher
+from .models import Order, OrderStatusHistory
+from .pricing import quote, quote_many
+from .transitions import TransitionError, apply_transition
 
-# Create your tests here.
+
+def make_voucher(voucher_type, discount_value, **kwargs):
+    return Voucher(voucher_type=voucher_type, discount_value=Decimal(discount_value), **kwargs)
+
+
+class PricingQuoteTests(TestCase):
+    """orders.pricing.quote: komponen harga, tiap tipe voucher, batas diskon dan pembulatan"""
+
+    @classmethod
+    def setUpTestData(cls):
+        CODRate.objects.create(min_distance_km=Decimal('0'), max_distance_km=Decimal('3'), fee=Decimal('5000'))
+        CODRate.objects.create(min_distance_km=Decimal('3.01'), max_distance_km=Decimal('6'), fee=Decimal('8000'))
+
+    def setUp(self):
+        # Signal CODRate memanggil invalidate() lewat on_commit, yang tidak jalan di TestCase
+        cod_rates.invalidate()
+        self.laundry = Laundry(price_per_kg=Decimal('7000'))
+
+    def test_quote_without_voucher(self):
+        prices = quote(self.laundry, 3, 2)
+
+        self.assertEqual(prices.laundry_price, Decimal('21000'))
+        self.assertEqual(prices.cod_fee, Decimal('5000'))
+        self.assertEqual(prices.platform_fee, Decimal('630'))
+        self.assertEqual(prices.voucher_discount, Decimal('0'))
+        self.assertEqual(prices.total_price, Decimal('26630'))
+
+    def test_cod_fee_follows_distance_tier(self):
+        self.assertEqual(quote(self.laundry, 3, 4).cod_fee, Decimal('8000'))
+        # Di luar semua tier pakai fee default
+        self.assertEqual(quote(self.laundry, 3, 20).cod_fee, Decimal(cod_rates.DEFAULT_FEE))
+
+    def test_free_shipping_discounts_cod_fee(self):
+        prices = quote(self.laundry, 3, 4, make_voucher('free_shipping', '0'))
+
+        self.assertEqual(prices.voucher_discount, Decimal('8000'))
+        self.assertEqual(prices.total_price, Decimal('21630'))
+
+    def test_percentage_discount(self):
+        prices = quote(self.laundry, 3, 2, make_voucher('percentage_discount', '10'))
+
+        self.assertEqual(prices.voucher_discount, Decimal('2100'))
+        self.assertEqual(prices.total_price, Decimal('24530'))
+
+    def test_percentage_discount_capped_by_max_discount(self):
+        voucher = make_voucher('percentage_discount', '10', max_discount=Decimal('1500'))
+        prices = quote(self.laundry, 3, 2, voucher)
+
+        self.assertEqual(prices.voucher_discount, Decimal('1500'))
+        self.assertEqual(prices.total_price, Decimal('25130'))
+
+    def test_fixed_discount(self):
+        prices = quote(self.laundry, 3, 2, make_voucher('fixed_discount', '3000'))
+
+        self.assertEqual(prices.voucher_discount, Decimal('3000'))
+        self.assertEqual(prices.total_price, Decimal('23630'))
+
+    def test_free_kg_uses_price_per_kg(self):
+        prices = quote(self.laundry, 3, 2, make_voucher('free_kg', '1'))
+
+        self.assertEqual(prices.voucher_discount, Decimal('7000'))
+        self.assertEqual(prices.total_price, Decimal('19630'))
+
+    def test_discount_capped_at_subtotal(self):
+        prices = quote(self.laundry, 3, 2, make_voucher('fixed_discount', '50000'))
+
+        self.assertEqual(prices.voucher_discount, Decimal('26630'))
+        self.assertEqual(prices.total_price, Decimal('0'))
+
+    def test_voucher_minimums_not_met(self):
+        by_kg = make_voucher('fixed_discount', '3000', min_order_kg=Decimal('5'))
+        by_amount = make_voucher('fixed_discount', '3000', min_order_amount=Decimal('25000'))
+
+        self.assertEqual(quote(self.laundry, 3, 2, by_kg).voucher_discount, Decimal('0'))
+        self.assertEqual(quote(self.laundry, 3, 2, by_amount).voucher_discount, Decimal('0'))
+
+    def test_rounding_is_half_up(self):
+        # 7001 * 1.5 = 10501.5 -> 10502
+        self.assertEqual(quote(Laundry(price_per_kg=Decimal('7001')), Decimal('1.5'), 2).laundry_price, Decimal('10502'))
+        # 3% dari 17550 = 526.5 -> 527 (bukan 526 seperti ROUND_HALF_EVEN)
+        prices = quote(Laundry(price_per_kg=Decimal('7020')), Decimal('2.5'), 2)
+        self.assertEqual(prices.laundry_price, Decimal('17550'))
+        self.assertEqual(prices.platform_fee, Decimal('527'))
+
+    def test_quote_many_keeps_order(self):
+        cheap = Laundry(price_per_kg=Decimal('5000'))
+        quotes = quote_many([(self.laundry, 3, 2, None), (cheap, 2, 4, None)])
+
+        self.assertEqual([q.total_price for q in quotes], [Decimal('26630'), Decimal('18300')])
+
+
+class ApplyTransitionTests(TestCase):
+    """orders.transitions.apply_transition: asal tidak sah, role salah, bulk sebagian"""
+
+    # Order.save mengambil nomor order dari core.ids (alias 'ids')
+    databases = {'default', 'ids'}
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.customer = User.objects.create_user('customer', password='x', role='user')
+        cls.mitra_user = User.objects.create_user('mitra', password='x', role='mitra')
+        cls.admin = User.objects.create_user('admin', password='x', role='admin')
+        mitra = MitraProfile.objects.create(
+            user=cls.mitra_user, business_name='Mitra', location='Yogyakarta',
+            description='-', operational_cost=Decimal('0'),
+        )
+        cls.laundry = Laundry.objects.create(
+            mitra=mitra, name='Laundry', address='Jl. Test', price_per_kg=Decimal('7000'),
+        )
+
+    def make_order(self, status='pending'):
+        return Order.objects.create(
+            user=self.customer, laundry=self.laundry, weight_kg=Decimal('3'),
+            pickup_address='Jl. Test', pickup_time=timezone.now() + timedelta(hours=1),
+            distance_km=Decimal('2'), status=status,
+        )
+
+    def test_moves_order_and_records_history(self):
+        order = self.make_order()
+
+        moved = apply_transition(Order.objects.filter(pk=order.pk), 'picked_up', self.mitra_user, notes='Dijemput')
+
+        self.assertEqual(moved, [order.pk])
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'picked_up')
+        history = OrderStatusHistory.objects.get(order=order)
+        self.assertEqual((history.status, history.notes, history.changed_by), ('picked_up', 'Dijemput', self.mitra_user))
+
+    def test_illegal_source_is_skipped(self):
+        order = self.make_order('delivered')
+
+        moved = apply_transition(Order.objects.filter(pk=order.pk), 'processing', self.mitra_user)
+
+        self.assertEqual(moved, [])
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'delivered')
+        self.assertFalse(OrderStatusHistory.objects.filter(order=order).exists())
+
+    def test_wrong_role_raises(self):
+        order = self.make_order('picked_up')
+
+        with self.assertRaisesMessage(TransitionError, 'Tidak dapat mengubah status menjadi'):
+            apply_transition(Order.objects.filter(pk=order.pk), 'processing', self.customer)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'picked_up')
+
+    def test_role_limited_per_source(self):
+        # Mitra boleh membatalkan order pending, tapi order yang sudah diproses hanya oleh admin
+        order = self.make_order('processing')
+
+        self.assertEqual(apply_transition(Order.objects.filter(pk=order.pk), 'cancelled', self.mitra_user), [])
+        self.assertEqual(apply_transition(Order.objects.filter(pk=order.pk), 'cancelled', self.admin), [order.pk])
+
+    def test_unknown_status_raises(self):
+        with self.assertRaises(TransitionError):
+            apply_transition(Order.objects.all(), 'lost', self.admin)
+
+    def test_bulk_partial_skip(self):
+        picked_up = [self.make_order('picked_up') for _ in range(3)]
+        pending = self.make_order('pending')
+        ready = self.make_order('ready')
+
+        moved = apply_transition(Order.objects.all(), 'processing', self.mitra_user)
+
+        self.assertEqual(moved, sorted(order.pk for order in picked_up))
+        statuses = dict(Order.objects.values_list('pk', 'status'))
+        self.assertEqual({statuses[order.pk] for order in picked_up}, {'processing'})
+        self.assertEqual(statuses[pending.pk], 'pending')
+        self.assertEqual(statuses[ready.pk], 'ready')
+        self.assertEqual(
+            sorted(OrderStatusHistory.objects.values_list('order_id', flat=True)),
+            moved,
+        )
+
+    def test_delivered_sets_actual_delivery(self):
+        order = self.make_order('ready')
+
+        self.assertEqual(apply_transition(Order.objects.filter(pk=order.pk), 'delivered', self.customer), [order.pk])
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'delivered')
+        self.assertIsNotNone(order.actual_delivery)
@@ -0,0 +1,103 @@
+"""State machine status order.
+
+Setiap perubahan status harus ada di TRANSITIONS sebagai (status asal, status
+tujuan) beserta role yang boleh melakukannya. Perubahan ditulis lewat
+apply_transition(): satu UPDATE ... WHERE status IN (asal yang sah) untuk semua
+order sekaligus, lalu riwayat status dengan satu bulk_create, dalam satu
+transaksi. Mitra bisa memindahkan puluhan order (misalnya semua yang sudah
+dijemput ke 'processing') dalam satu request.
+"""
+from django.db import transaction
+from django.utils import timezone
+from .models import Order, OrderStatusHistory
+
+MITRA_ROLES = frozenset({'mitra', 'admin'})
+
+# (asal, tujuan) -> role yang boleh
+TRANSITIONS = {
+    ('pending', 'picked_up'): MITRA_ROLES,
+    ('picked_up', 'processing'): MITRA_ROLES,
+    ('processing', 'ready'): MITRA_ROLES,
+    # Customer mengonfirmasi penerimaan; mitra/admin bisa menandai sudah diantar
+    ('ready', 'delivered'): frozenset({'user', 'mitra', 'admin'}),
+    ('pending', 'cancelled'): MITRA_ROLES,
+    ('picked_up', 'cancelled'): frozenset({'admin'}),
+    ('processing', 'cancelled'): frozenset({'admin'}),
+    ('ready', 'cancelled'): frozenset({'admin'}),
+}
+
+# Field waktu yang diisi saat order masuk status tertentu
+STATUS_TIMESTAMPS = {
+    'delivered': 'actual_delivery',
+}
+
+MAX_BULK_ORDERS = 200
+
+STATUS_LABELS = dict(Order.STATUS_CHOICES)
+
+
+class TransitionError(ValueError):
+    pass
+
+
+def can_transition(from_status, to_status, role):
+    return role in TRANSITIONS.get((from_status, to_status), ())
+
+
+def sources_for(to_status, role):
+    """Status asal yang boleh dipindah ke `to_status` oleh `role`"""
+    return [
+        from_status for (from_status, target), roles in TRANSITIONS.items()
+        if target == to_status and role in roles
+    ]
+
+
+def next_statuses(from_status, role):
+    """[(status, label)] yang bisa dituju dari `from_status` oleh `role`, urut STATUS_CHOICES"""
+    return [
+        (status, label) for status, label in Order.STATUS_CHOICES
+        if can_transition(from_status, status, role)
+    ]
+
+
+def orders_for(user):
+    """Order yang boleh diubah statusnya oleh user ini"""
+    if user.role == 'admin':
+        return Order.objects.all()
+    if user.role == 'mitra':
+        return Order.objects.filter(mitra__user=user)
+    return Order.objects.filter(user=user)
+
+
+def apply_transition(orders, to_status, user, notes=''):
+    """Pindahkan semua `orders` (queryset) yang statusnya sah ke `to_status`.
+
+    Mengembalikan list id order yang berpindah; order yang statusnya tidak
+    memenuhi TRANSITIONS dilewati. TransitionError jika `to_status` tidak
+    dikenal atau tidak bisa dituju oleh role user sama sekali.
+    """
+    if to_status not in STATUS_LABELS:
+        raise TransitionError(f'Status tidak dikenal: {to_status}')
+    sources = sources_for(to_status, user.role)
+    if not sources:
+        raise TransitionError(f'Tidak dapat mengubah status menjadi {STATUS_LABELS[to_status]}')
+
+    now = timezone.now()
+    changes = {'status': to_status, 'updated_at': now}
+    if to_status in STATUS_TIMESTAMPS:
+        changes[STATUS_TIMESTAMPS[to_status]] = now
+
+    with transaction.atomic():
+        # Row dikunci agar id yang dicatat di riwayat sama persis dengan yang di-UPDATE
+        order_ids = list(
+            orders.filter(status__in=sources).select_for_update(of=('self',))
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        if not order_ids:
+            return []
+        Order.objects.filter(pk__in=order_ids, status__in=sources).update(**changes)
+        OrderStatusHistory.objects.bulk_create([
+            OrderStatusHistory(order_id=order_id, status=to_status, notes=notes, changed_by=user)
+            for order_id in order_ids
+        ])
+    return order_ids
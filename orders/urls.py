@@ -5,10 +5,12 @@ app_name = 'orders'
 
 urlpatterns = [
     path('create/', views.create_order, name='create_order'),
+    path('api/quotes/', views.quote_api, name='quote_api'),
     path('track/<str:order_number>/', views.track_order, name='track_order'),
     path('my-orders/', views.my_orders, name='my_orders'),
     path('history/', views.order_history, name='order_history'),
     path('update-status/<int:order_id>/', views.update_order_status, name='update_order_status'),
+    path('bulk-update-status/', views.bulk_update_order_status, name='bulk_update_order_status'),
     
     # Delivery confirmation
     path('confirm-delivery/<str:order_number>/', views.confirm_delivery, name='confirm_delivery'),
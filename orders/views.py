@@ -1,16 +1,32 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from .models import Order, Service, OrderStatusHistory, TransactionLog, Payment, PaymentIssue
-from partners.models import MitraProfile, Laundry, CODRate, MitraTransaction
-from datetime import datetime, timedelta
+from . import pricing, proof_hashes, quotes, transitions
+from partners.models import Laundry, MitraTransaction, Voucher
+from partners import detail_cache, geo, voucher_cache
+from partners.cod_rates import active_rates as active_cod_rates
+from datetime import timedelta
 from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.views.decorators.http import condition
 from django.utils import timezone
 from django.core.mail import send_mail
 from django.conf import settings
+from core.conditional import page_etag
+from core.idempotency import idempotent
+from core.uploadhandlers import rejected_uploads
+
+def _voucher_used(laundry_id):
+    """Kuota voucher laundry berubah: buang daftar voucher & fragment detail yang ter-cache"""
+    voucher_cache.invalidate(laundry_id)
+    detail_cache.invalidate(laundry_id)
 
 @login_required
+@idempotent
 def create_order(request):
     # Get laundry_id from URL parameter
     laundry_id = request.GET.get('laundry')
@@ -20,7 +36,14 @@ def create_order(request):
         messages.info(request, 'Silakan pilih laundry terlebih dahulu')
         return redirect('core:dashboard')
     
-    selected_laundry = get_object_or_404(Laundry, id=laundry_id, is_active=True)
+    # Get user coordinates (session, fallback ke pusat kota Yogyakarta)
+    user_lat, user_lon = geo.user_location_from_session(request.session, default=geo.DEFAULT_LOCATION)
+    
+    # Jarak dihitung database sekalian saat mengambil laundry
+    active_laundries = Laundry.objects.filter(is_active=True).with_distance(user_lat, user_lon)
+    selected_laundry = get_object_or_404(active_laundries, id=laundry_id)
+    # Validasi gagal kembali ke checkout laundry yang sama
+    checkout_url = f"{reverse('orders:create_order')}?laundry={selected_laundry.pk}"
     
     if request.method == 'POST':
         laundry_id = request.POST.get('laundry')
@@ -33,78 +56,92 @@ def create_order(request):
         # Validate required fields
         if not all([laundry_id, weight_kg, delivery_address, pickup_time]):
             messages.error(request, 'Semua field harus diisi')
-            return redirect('orders:create_order')
+            return redirect(checkout_url)
         
         # Validate weight
         try:
             weight = Decimal(weight_kg)
             if weight <= 0:
                 messages.error(request, 'Berat harus lebih dari 0 kg')
-                return redirect('orders:create_order')
+                return redirect(checkout_url)
             if weight > 1000:  # Sanity check
                 messages.error(request, 'Berat maksimal 1000 kg')
-                return redirect('orders:create_order')
+                return redirect(checkout_url)
         except (ValueError, InvalidOperation):
             messages.error(request, 'Berat tidak valid')
-            return redirect('orders:create_order')
-        
-        # Get user coordinates (for now, use default Yogyakarta city center)
-        # TODO: Implement user geolocation
-        user_lat = Decimal('-7.797068')  # Yogyakarta city center
-        user_lon = Decimal('110.370529')
+            return redirect(checkout_url)
         
-        try:
-            laundry = get_object_or_404(Laundry, id=laundry_id, is_active=True)
-        except:
-            messages.error(request, 'Laundry tidak ditemukan')
-            return redirect('orders:create_order')
-        
-        # Calculate distance
-        distance_km = laundry.calculate_distance(user_lat, user_lon)
+        # Laundry dari URL sudah diambil (beserta jaraknya) di atas, tidak perlu query ulang
+        if str(laundry_id) == str(selected_laundry.pk):
+            laundry = selected_laundry
+        else:
+            laundry = active_laundries.filter(id=laundry_id).first()
+            if laundry is None:
+                messages.error(request, 'Laundry tidak ditemukan')
+                return redirect(checkout_url)
         
-        # Calculate pricing
-        laundry_price = laundry.price_per_kg * weight
-        cod_fee = Decimal(str(CODRate.get_fee_for_distance(distance_km)))
-        platform_fee = laundry_price * Decimal('0.03')  # 3% platform fee
-        total_price = laundry_price + cod_fee + platform_fee
+        # Distance sudah dianotasi oleh database
+        distance_km = laundry.distance or 0
         
         # Set estimated delivery (3 days from now)
-        estimated_delivery = datetime.now() + timedelta(days=3)
-        
-        # Create order
-        order = Order.objects.create(
-            user=request.user,
-            laundry=laundry,
-            mitra=laundry.mitra,
-            weight_kg=weight,
-            delivery_address=delivery_address,
-            pickup_time=pickup_time,
-            distance_km=distance_km,
-            laundry_price=laundry_price,
-            cod_fee=cod_fee,
-            platform_fee=platform_fee,
-            total_price=total_price,
-            payment_method=payment_method,
-            estimated_delivery=estimated_delivery,
-            notes=notes,
-            status='pending'
-        )
-        
-        # Create status history
-        OrderStatusHistory.objects.create(
-            order=order,
-            status='pending',
-            notes='Pesanan dibuat melalui marketplace',
-            changed_by=request.user
-        )
-        
-        # Create transaction log
-        TransactionLog.objects.create(
-            order=order,
-            action='ORDER_CREATED',
-            description=f'Order created for {laundry.name} - {weight}kg',
-            performed_by=request.user
-        )
+        estimated_delivery = timezone.now() + timedelta(days=3)
+        
+        voucher_id = request.POST.get('voucher')
+        
+        # Voucher, order, riwayat & log ditulis dalam satu transaksi: gagal di tengah
+        # tidak meninggalkan order tanpa riwayat atau kuota voucher yang terpakai
+        with transaction.atomic():
+            voucher = None
+            if voucher_id:
+                # Row voucher dikunci sampai commit: kuota & batas per user dicek dan
+                # dinaikkan tanpa bisa didahului checkout lain dengan voucher yang sama
+                voucher = Voucher.objects.select_for_update().filter(pk=voucher_id, laundry=laundry).first()
+                if voucher is None or not voucher.can_be_used_by(request.user):
+                    messages.error(request, 'Voucher tidak berlaku untuk pesanan ini')
+                    return redirect(checkout_url)
+            
+            prices = pricing.quote(laundry, weight, distance_km, voucher)
+            
+            order = Order.objects.create(
+                user=request.user,
+                laundry=laundry,
+                mitra_id=laundry.mitra_id,
+                weight_kg=weight,
+                delivery_address=delivery_address,
+                pickup_time=pickup_time,
+                distance_km=distance_km,
+                laundry_price=prices.laundry_price,
+                cod_fee=prices.cod_fee,
+                platform_fee=prices.platform_fee,
+                voucher=voucher,
+                voucher_discount=prices.voucher_discount,
+                total_price=prices.total_price,
+                payment_method=payment_method,
+                estimated_delivery=estimated_delivery,
+                notes=notes,
+                status='pending'
+            )
+            
+            if voucher:
+                Voucher.objects.filter(pk=voucher.pk).update(
+                    used_count=F('used_count') + 1, updated_at=timezone.now(),
+                )
+                # update() tidak memicu signal: cache voucher & detail laundry dibuang
+                # setelah commit agar request lain tidak meng-cache kuota lama
+                transaction.on_commit(lambda: _voucher_used(laundry.pk))
+            
+            OrderStatusHistory.objects.create(
+                order=order,
+                status='pending',
+                notes='Pesanan dibuat melalui marketplace',
+                changed_by=request.user
+            )
+            TransactionLog.objects.create(
+                order=order,
+                action='ORDER_CREATED',
+                description=f'Order created for {laundry.name} - {weight}kg',
+                performed_by=request.user
+            )
         
         messages.success(request, f'Pesanan berhasil dibuat! No. Order: {order.order_number}')
         
@@ -114,19 +151,12 @@ def create_order(request):
         
         return redirect('orders:track_order', order_number=order.order_number)
     
-    # Get user coordinates (use session or default)
-    user_lat = request.session.get('user_latitude', -7.797068)  # Yogyakarta default
-    user_lon = request.session.get('user_longitude', 110.370529)
-    
-    # Calculate distance for selected laundry
-    distance = selected_laundry.calculate_distance(float(user_lat), float(user_lon))
-    selected_laundry.distance = distance
-    
     # Get COD rates for display
-    cod_rates = CODRate.objects.filter(is_active=True).order_by('min_distance_km')
+    cod_rates = active_cod_rates()
     
     context = {
         'selected_laundry': selected_laundry,
+        'vouchers': voucher_cache.active_vouchers(selected_laundry),
         'cod_rates': cod_rates,
         'user_lat': user_lat,
         'user_lon': user_lon,
@@ -134,6 +164,66 @@ def create_order(request):
     return render(request, 'orders/create_order.html', context)
 
 @login_required
+def quote_api(request):
+    """Total harga, COD fee & estimasi waktu untuk semua laundry terdekat (weight=..&lat=..&lon=..)"""
+    try:
+        weight = Decimal(request.GET.get('weight', ''))
+    except InvalidOperation:
+        return JsonResponse({'success': False, 'error': 'Berat tidak valid'}, status=400)
+    if not weight.is_finite() or weight <= 0 or weight > 1000:
+        return JsonResponse({'success': False, 'error': 'Berat harus antara 0 dan 1000 kg'}, status=400)
+    
+    try:
+        radius_km = float(request.GET.get('radius', geo.DEFAULT_NEARBY_RADIUS_KM))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Radius tidak valid'}, status=400)
+    if not (0 < radius_km <= quotes.MAX_RADIUS_KM):
+        return JsonResponse({'success': False, 'error': f'Radius maksimal {quotes.MAX_RADIUS_KM} km'}, status=400)
+    
+    if request.GET.get('lat') or request.GET.get('lon'):
+        user_lat, user_lon = request.GET.get('lat'), request.GET.get('lon')
+        if not geo.is_valid_location(user_lat, user_lon):
+            return JsonResponse({'success': False, 'error': 'Lokasi tidak valid'}, status=400)
+        user_lat, user_lon = float(user_lat), float(user_lon)
+    else:
+        # Lokasi yang sama dengan create_order (session, fallback pusat kota)
+        user_lat, user_lon = geo.user_location_from_session(request.session, default=geo.DEFAULT_LOCATION)
+        if not geo.is_valid_location(user_lat, user_lon):
+            user_lat, user_lon = geo.DEFAULT_LOCATION
+    
+    return JsonResponse({
+        'success': True,
+        'weight_kg': float(weight),
+        'results': quotes.compare(weight, user_lat, user_lon, radius_km),
+    })
+
+def _track_order_etag(request, order_number):
+    """Timestamp order, laundry & riwayat status dalam satu query; None jika user tidak berhak"""
+    row = Order.objects.filter(order_number=order_number).values(
+        'user_id', 'mitra__user_id', 'updated_at', 'laundry__updated_at',
+    ).annotate(
+        history_at=Max('status_history__created_at'),
+        history_count=Count('status_history'),
+    ).order_by('pk').first()
+    if row is None:
+        return None
+    
+    # Akses ditolak tetap lewat view (redirect + pesan), bukan 304
+    role = request.user.role
+    allowed = (
+        role == 'admin'
+        or (role == 'user' and row['user_id'] == request.user.pk)
+        or (role == 'mitra' and row['mitra__user_id'] == request.user.pk)
+    )
+    if not allowed:
+        return None
+    return page_etag(
+        request, 'track_order', order_number, row['updated_at'], row['laundry__updated_at'],
+        row['history_at'], row['history_count'],
+    )
+
+@login_required
+@condition(etag_func=_track_order_etag)
 def track_order(request, order_number):
     order = get_object_or_404(Order, order_number=order_number)
     
@@ -162,7 +252,8 @@ def track_order(request, order_number):
     
     context = {
         'order': order,
-        'status_history': status_history
+        'status_history': status_history,
+        'next_statuses': transitions.next_statuses(order.status, request.user.role),
     }
     return render(request, 'orders/track_order.html', context)
 
@@ -175,24 +266,19 @@ def confirm_delivery(request, order_number):
     
     order = get_object_or_404(Order, order_number=order_number, user=request.user)
     
-    # Only allow confirmation if order is ready or in_transit
-    if order.status not in ['ready', 'in_transit']:
+    if not transitions.can_transition(order.status, 'delivered', request.user.role):
         messages.error(request, 'Pesanan tidak dapat dikonfirmasi pada status saat ini')
         return redirect('orders:my_orders')
     
     if request.method == 'POST':
-        # Update order status to delivered
-        order.status = 'delivered'
-        order.actual_delivery = timezone.now()
-        order.save()
-        
-        # Create status history
-        OrderStatusHistory.objects.create(
-            order=order,
-            status='delivered',
-            notes='Konfirmasi penerimaan oleh customer',
-            changed_by=request.user
+        updated = transitions.apply_transition(
+            Order.objects.filter(pk=order.pk), 'delivered', request.user,
+            'Konfirmasi penerimaan oleh customer',
         )
+        if not updated:
+            # Status berubah di antara GET dan POST
+            messages.error(request, 'Pesanan tidak dapat dikonfirmasi pada status saat ini')
+            return redirect('orders:my_orders')
         
         # Create transaction log
         TransactionLog.objects.create(
@@ -220,7 +306,7 @@ def my_orders(request):
     
     # Separate by status for tabs
     orders_processing = all_orders.filter(status__in=['pending', 'processing', 'picked_up'])
-    orders_in_transit = all_orders.filter(status__in=['ready', 'in_transit'])
+    orders_in_transit = all_orders.filter(status='ready')
     orders_completed = all_orders.filter(status='delivered')
     orders_cancelled = all_orders.filter(status='cancelled')
     
@@ -256,25 +342,29 @@ def update_order_status(request, order_id):
         return JsonResponse({'success': False, 'message': 'Unauthorized'}, status=403)
     
     if request.method == 'POST':
-        order = get_object_or_404(Order, id=order_id)
+        order = get_object_or_404(transitions.orders_for(request.user), id=order_id)
         new_status = request.POST.get('status')
         notes = request.POST.get('notes', '')
+        is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
         
-        order.status = new_status
-        order.save()
-        
-        OrderStatusHistory.objects.create(
-            order=order,
-            status=new_status,
-            notes=notes,
-            changed_by=request.user
-        )
+        try:
+            updated = transitions.apply_transition(Order.objects.filter(pk=order.pk), new_status, request.user, notes)
+            if not updated:
+                raise transitions.TransitionError(
+                    f'Status {order.get_status_display()} tidak dapat diubah menjadi '
+                    f'{transitions.STATUS_LABELS[new_status]}'
+                )
+        except transitions.TransitionError as e:
+            if is_ajax:
+                return JsonResponse({'success': False, 'message': str(e)}, status=400)
+            messages.error(request, str(e))
+            return redirect('orders:track_order', order_number=order.order_number)
         
-        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        if is_ajax:
             return JsonResponse({
                 'success': True,
                 'message': 'Status berhasil diperbarui',
-                'new_status': order.get_status_display()
+                'new_status': transitions.STATUS_LABELS[new_status]
             })
         
         messages.success(request, 'Status pesanan berhasil diperbarui')
@@ -282,8 +372,50 @@ def update_order_status(request, order_id):
     
     return JsonResponse({'success': False, 'message': 'Invalid request'}, status=400)
 
+@login_required
+def bulk_update_order_status(request):
+    """Ubah status banyak order sekaligus (order_ids=1,2,3&status=processing), satu transaksi"""
+    if request.user.role not in ['mitra', 'admin']:
+        return JsonResponse({'success': False, 'error': 'Unauthorized'}, status=403)
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
+    
+    try:
+        order_ids = {
+            int(value) for raw in request.POST.getlist('order_ids')
+            for value in raw.split(',') if value.strip()
+        }
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'order_ids tidak valid'}, status=400)
+    if not order_ids:
+        return JsonResponse({'success': False, 'error': 'Pilih minimal satu pesanan'}, status=400)
+    if len(order_ids) > transitions.MAX_BULK_ORDERS:
+        return JsonResponse({
+            'success': False, 'error': f'Maksimal {transitions.MAX_BULK_ORDERS} pesanan per permintaan',
+        }, status=400)
+    
+    new_status = request.POST.get('status')
+    try:
+        updated = transitions.apply_transition(
+            transitions.orders_for(request.user).filter(pk__in=order_ids),
+            new_status,
+            request.user,
+            request.POST.get('notes', ''),
+        )
+    except transitions.TransitionError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'new_status': transitions.STATUS_LABELS[new_status],
+        'updated': updated,
+        # Bukan milik user ini, tidak ada, atau statusnya tidak bisa pindah ke status baru
+        'skipped': sorted(order_ids.difference(updated)),
+    })
+
 
 @login_required
+@idempotent
 def upload_payment(request, order_number):
     """Upload payment proof for online payment methods"""
     order = get_object_or_404(Order, order_number=order_number, user=request.user)
@@ -305,19 +437,14 @@ def upload_payment(request, order_number):
     if request.method == 'POST':
         proof_image = request.FILES.get('proof_image')
         
-        if not proof_image:
-            messages.error(request, 'Harap upload bukti pembayaran')
-            return redirect('orders:upload_payment', order_number=order_number)
-        
-        # Validate file size (max 5MB)
-        if proof_image.size > 5 * 1024 * 1024:
-            messages.error(request, 'Ukuran file terlalu besar (maksimal 5MB)')
+        # Ukuran & format (magic bytes) sudah dicek ImageUploadHandler saat upload
+        rejected = rejected_uploads(request, 'proof_image')
+        if rejected:
+            messages.error(request, rejected[0])
             return redirect('orders:upload_payment', order_number=order_number)
         
-        # Validate file type (only images)
-        allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/webp']
-        if proof_image.content_type not in allowed_types:
-            messages.error(request, 'Format file tidak didukung. Gunakan JPG, PNG, atau WEBP')
+        if not proof_image:
+            messages.error(request, 'Harap upload bukti pembayaran')
             return redirect('orders:upload_payment', order_number=order_number)
         
         # Create or update payment
@@ -371,7 +498,12 @@ def admin_verify_payments(request):
         return redirect('core:dashboard')
     
     # Get all pending payments
-    pending_payments = Payment.objects.filter(status='pending').select_related('order', 'order__user')
+    pending_payments = list(Payment.objects.filter(status='pending').select_related('order', 'order__user'))
+    
+    # Bukti yang mirip dengan bukti di order lain (satu query untuk semua pending)
+    near_duplicates = proof_hashes.near_duplicates(pending_payments)
+    for payment in pending_payments:
+        payment.similar_proofs = near_duplicates.get(payment.id, [])
     verified_payments = Payment.objects.filter(status='verified').select_related('order', 'order__user')[:20]
     rejected_payments = Payment.objects.filter(status='rejected').select_related('order', 'order__user')[:20]
     
@@ -485,6 +617,11 @@ def report_payment_issue(request):
         description = request.POST.get('description')
         screenshot = request.FILES.get('screenshot')
         
+        rejected = rejected_uploads(request, 'screenshot')
+        if rejected:
+            messages.error(request, rejected[0])
+            return redirect('orders:report_payment_issue')
+        
         # Create issue
         order = None
         if order_id:
@@ -684,17 +821,11 @@ def submit_review(request, order_number):
         photo2 = request.FILES.get('photo2')
         photo3 = request.FILES.get('photo3')
         
-        # Validate photos
-        allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/webp']
-        for photo in [photo1, photo2, photo3]:
-            if photo:
-                if photo.size > 5 * 1024 * 1024:  # 5MB
-                    messages.error(request, f'File {photo.name} terlalu besar (maksimal 5MB)')
-                    return redirect('orders:submit_review', order_number=order_number)
-                
-                if photo.content_type not in allowed_types:
-                    messages.error(request, f'File {photo.name} format tidak didukung. Gunakan JPG, PNG, atau WEBP')
-                    return redirect('orders:submit_review', order_number=order_number)
+        # Foto yang terlalu besar / bukan gambar sudah ditolak ImageUploadHandler
+        rejected = rejected_uploads(request)
+        if rejected:
+            messages.error(request, rejected[0])
+            return redirect('orders:submit_review', order_number=order_number)
         
         # Create review
         review = Review.objects.create(
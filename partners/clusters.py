@@ -0,0 +1,185 @@
+"""Clustering marker laundry di server untuk peta.
+
+Peta dibagi menjadi tile lat/lon berukuran 360 / 2^zoom derajat, dan setiap tile
+dibagi lagi menjadi CELLS_PER_TILE x CELLS_PER_TILE sel grid. Laundry di satu sel
+digabung menjadi satu cluster lewat GROUP BY di database. Hasil per tile
+disimpan di cache dengan version per tile: perubahan satu laundry hanya
+membuang tile (di setiap zoom) yang memuat koordinat lama dan barunya, dan hanya
+jika field yang tampil di cluster berubah. VERSION_KEY global tetap ada untuk
+membuang semua tile sekaligus (misalnya setelah import data massal).
+"""
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, FloatField, Max, Min
+from django.db.models.functions import Floor
+from core.cache_versions import get_version, bump_version
+from math import floor, isfinite
+import time
+
+VERSION_KEY = 'laundry_clusters:version'
+TILE_VERSION_PREFIX = 'laundry_clusters:tile_version'
+CACHE_TIMEOUT = 60 * 60
+
+MIN_ZOOM = 1
+MAX_ZOOM = 20
+CELLS_PER_TILE = 4
+
+# Batas jumlah tile per request agar satu viewport tidak memicu scan besar
+MAX_TILES_PER_REQUEST = 256
+
+
+# Field Laundry yang menentukan isi cluster (posisi, keanggotaan, harga & rating di marker)
+CLUSTER_FIELDS = ('latitude', 'longitude', 'is_active', 'price_per_kg', 'rating')
+IS_ACTIVE = CLUSTER_FIELDS.index('is_active')
+
+
+def invalidate():
+    """Buang semua tile di semua zoom"""
+    bump_version(VERSION_KEY)
+
+
+def _tile_version_key(zoom, tile):
+    return f'{TILE_VERSION_PREFIX}:{zoom}:{tile[0]}:{tile[1]}'
+
+
+def tile_for_point(lat, lon, zoom):
+    size = tile_size_deg(zoom)
+    return floor(float(lat) / size), floor(float(lon) / size)
+
+
+def invalidate_points(points):
+    """Buang tile (semua zoom) yang memuat salah satu koordinat (lat, lon) di `points`"""
+    version = time.time_ns()
+    keys = {
+        _tile_version_key(zoom, tile_for_point(lat, lon, zoom))
+        for lat, lon in points if lat is not None and lon is not None
+        for zoom in range(MIN_ZOOM, MAX_ZOOM + 1)
+    }
+    if keys:
+        cache.set_many({key: version for key in keys}, None)
+
+
+def cluster_state(values):
+    """Tuple field cluster dari dict/instance laundry, None jika tidak ada"""
+    if values is None:
+        return None
+    get = values.get if isinstance(values, dict) else lambda field: getattr(values, field)
+    # Nilai dinormalisasi: instance bisa berisi str/float dari form, database berisi Decimal
+    return tuple(
+        bool(value) if field == 'is_active' else None if value is None else round(float(value), 6)
+        for field, value in ((field, get(field)) for field in CLUSTER_FIELDS)
+    )
+
+
+def invalidate_change(old_state, new_state):
+    """Buang tile lama & baru jika isi cluster laundry berubah (state dari cluster_state())"""
+    if old_state == new_state:
+        return
+    points = []
+    for state in (old_state, new_state):
+        # Laundry nonaktif tidak tampil di tile mana pun
+        if state is not None and state[IS_ACTIVE]:
+            points.append((state[0], state[1]))
+    invalidate_points(points)
+
+
+def clamp_bbox(min_lat, min_lon, max_lat, max_lon):
+    """Bbox dibatasi ke -90..90 / -180..180; ValueError jika ada nilai tidak berhingga"""
+    if not all(isfinite(value) for value in (min_lat, min_lon, max_lat, max_lon)):
+        raise ValueError('Parameter bbox tidak valid')
+    return (
+        max(-90.0, min(min_lat, 90.0)), max(-180.0, min(min_lon, 180.0)),
+        max(-90.0, min(max_lat, 90.0)), max(-180.0, min(max_lon, 180.0)),
+    )
+
+
+def tile_size_deg(zoom):
+    return 360.0 / (2 ** zoom)
+
+
+def tiles_for_bbox(min_lat, min_lon, max_lat, max_lon, zoom):
+    """Semua (row, col) tile yang beririsan dengan viewport"""
+    size = tile_size_deg(zoom)
+    rows = range(floor(min_lat / size), floor(max_lat / size) + 1)
+    cols = range(floor(min_lon / size), floor(max_lon / size) + 1)
+    return [(row, col) for row in rows for col in cols]
+
+
+def _cache_key(version, zoom, tile):
+    return f'laundry_clusters:{version}:{zoom}:{tile[0]}:{tile[1]}'
+
+
+def _compute_tiles(tiles, zoom):
+    """Hitung cluster laundry aktif untuk sekumpulan tile dengan satu query GROUP BY"""
+    from .models import Laundry
+    size = tile_size_deg(zoom)
+    cell = size / CELLS_PER_TILE
+    min_row = min(row for row, _ in tiles)
+    max_row = max(row for row, _ in tiles)
+    min_col = min(col for _, col in tiles)
+    max_col = max(col for _, col in tiles)
+
+    groups = (
+        Laundry.objects
+        .filter(
+            is_active=True,
+            latitude__gte=min_row * size, latitude__lt=(max_row + 1) * size,
+            longitude__gte=min_col * size, longitude__lt=(max_col + 1) * size,
+        )
+        .annotate(
+            cell_row=Floor(F('latitude') / cell, output_field=FloatField()),
+            cell_col=Floor(F('longitude') / cell, output_field=FloatField()),
+        )
+        .values('cell_row', 'cell_col')
+        .annotate(
+            count=Count('id'),
+            lat=Avg('latitude', output_field=FloatField()),
+            lon=Avg('longitude', output_field=FloatField()),
+            min_price=Min('price_per_kg'),
+            best_rating=Max('rating'),
+            laundry_id=Min('id'),
+        )
+        .order_by()
+    )
+
+    result = {tile: [] for tile in tiles}
+    for group in groups:
+        tile = (int(group['cell_row']) // CELLS_PER_TILE, int(group['cell_col']) // CELLS_PER_TILE)
+        if tile not in result:
+            continue
+        result[tile].append({
+            'count': group['count'],
+            'lat': round(group['lat'], 6),
+            'lon': round(group['lon'], 6),
+            'min_price': float(group['min_price']),
+            'best_rating': float(group['best_rating']),
+            # Cluster berisi satu laundry bisa langsung ditautkan ke halaman detail
+            'laundry_id': group['laundry_id'] if group['count'] == 1 else None,
+        })
+    return result
+
+
+def clusters_for_bbox(min_lat, min_lon, max_lat, max_lon, zoom):
+    """List cluster untuk viewport, diambil dari cache per tile jika tersedia"""
+    tiles = tiles_for_bbox(min_lat, min_lon, max_lat, max_lon, zoom)
+    if len(tiles) > MAX_TILES_PER_REQUEST:
+        raise ValueError('Viewport terlalu besar untuk zoom ini')
+
+    version = get_version(VERSION_KEY)
+    tile_versions = cache.get_many([_tile_version_key(zoom, tile) for tile in tiles])
+    keys = {
+        # Tile yang belum pernah diubah tidak punya version key sendiri
+        tile: _cache_key(f'{version}.{tile_versions.get(_tile_version_key(zoom, tile), 0)}', zoom, tile)
+        for tile in tiles
+    }
+    cached = cache.get_many(keys.values())
+
+    missing = [tile for tile in tiles if keys[tile] not in cached]
+    if missing:
+        computed = _compute_tiles(missing, zoom)
+        cache.set_many({keys[tile]: clusters for tile, clusters in computed.items()}, CACHE_TIMEOUT)
+        cached.update({keys[tile]: clusters for tile, clusters in computed.items()})
+
+    clusters = []
+    for tile in tiles:
+        clusters.extend(cached[keys[tile]])
+    return clusters
@@ -0,0 +1,90 @@
+"""Tabel tarif COD in-process.
+
+Tarif aktif (hanya belasan baris) dimuat sekali per worker ke list terurut dan
+dijawab dengan binary search. Setiap perubahan CODRate menaikkan version key di
+cache bersama, sehingga semua worker gunicorn memuat ulang tabel tanpa restart.
+"""
+from bisect import bisect_right
+from decimal import Decimal
+from core.cache_versions import get_version, bump_version
+import threading
+import time
+
+VERSION_KEY = 'cod_rates:version'
+
+# Seberapa sering (detik) worker mengecek version key di cache
+VERSION_CHECK_INTERVAL = 5
+
+# Fee jika jarak tidak masuk tier manapun
+DEFAULT_FEE = 5000
+DEFAULT_FEE_DECIMAL = Decimal(DEFAULT_FEE)
+
+_lock = threading.Lock()
+_table = {
+    'version': None,
+    'checked_at': 0.0,
+    'min_distances': [],
+    'rates': [],
+}
+
+
+def invalidate():
+    """Tandai tabel usang di semua worker (dipanggil dari signal CODRate)"""
+    bump_version(VERSION_KEY)
+    # Worker ini langsung cek ulang pada lookup berikutnya
+    _table['checked_at'] = 0.0
+
+
+def _load_rates():
+    from .models import CODRate
+    return list(CODRate.objects.filter(is_active=True).order_by('min_distance_km', 'id'))
+
+
+def _get_table():
+    now = time.monotonic()
+    if now - _table['checked_at'] < VERSION_CHECK_INTERVAL and _table['version'] is not None:
+        return _table
+
+    with _lock:
+        if now - _table['checked_at'] < VERSION_CHECK_INTERVAL and _table['version'] is not None:
+            return _table
+        version = get_version(VERSION_KEY)
+        if version != _table['version'] or _table['version'] is None:
+            rates = _load_rates()
+            _table['min_distances'] = [float(rate.min_distance_km) for rate in rates]
+            _table['rates'] = rates
+            _table['version'] = version
+        _table['checked_at'] = now
+    return _table
+
+
+def active_rates():
+    """Semua tarif aktif, urut jarak minimum"""
+    return list(_get_table()['rates'])
+
+
+def _fee(min_distances, rates, distance_km):
+    index = bisect_right(min_distances, distance_km) - 1
+    if index >= 0:
+        rate = rates[index]
+        if distance_km <= float(rate.max_distance_km):
+            return rate.fee
+    return DEFAULT_FEE_DECIMAL
+
+
+def fee_for_distance(distance_km):
+    """Fee COD (float) untuk jarak tertentu, tanpa query database.
+
+    Tier diasumsikan tidak saling tumpang tindih: tier yang dipakai adalah tier
+    dengan jarak minimum terbesar yang <= distance_km, asalkan jarak maksimumnya
+    juga mencakup distance_km.
+    """
+    table = _get_table()
+    return float(_fee(table['min_distances'], table['rates'], float(distance_km)))
+
+
+def fee_lookup():
+    """Fungsi jarak -> fee COD (Decimal) atas satu snapshot tabel, untuk banyak lookup sekaligus"""
+    table = _get_table()
+    min_distances, rates = table['min_distances'], table['rates']
+    return lambda distance_km: _fee(min_distances, rates, float(distance_km))
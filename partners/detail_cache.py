@@ -0,0 +1,125 @@
+"""Fragment cache halaman detail laundry.
+
+Bagian yang jarang berubah (galeri foto, ringkasan rating & daftar ulasan)
+dirender sekali lalu disimpan di cache dengan key berisi version per laundry.
+Version dinaikkan lewat signal setiap Laundry, LaundryImage, Voucher, Review,
+profil mitra atau profil reviewer (nama, foto) berubah, jadi entry lama
+otomatis tidak terpakai lagi. Yang dihitung per request hanya data milik user
+(jarak).
+"""
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from core.cache_versions import get_version, bump_version
+from . import rating_stats, review_feed
+import threading
+import time
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# Field user yang dirender di kartu ulasan
+REVIEWER_FIELDS = {'username', 'first_name', 'last_name', 'profile_picture', 'image_derivatives'}
+
+FRAGMENT_TEMPLATES = {
+    'gallery': 'partners/fragments/laundry_gallery.html',
+    'reviews': 'partners/fragments/laundry_reviews.html',
+}
+
+HITS_KEY = 'laundry_detail_cache:hits'
+MISSES_KEY = 'laundry_detail_cache:misses'
+
+# Counter hit/miss dikumpulkan per worker lalu ditulis ke cache bersama paling
+# sering sekali per interval ini (detik), agar tidak menambah query tiap request
+COUNTER_FLUSH_INTERVAL = 30
+
+_counter_lock = threading.Lock()
+_pending = {'hits': 0, 'misses': 0, 'flushed_at': time.monotonic()}
+
+def version_key(laundry_id):
+    return f'laundry_detail:{laundry_id}:version'
+
+
+def invalidate(laundry_id):
+    bump_version(version_key(laundry_id))
+
+
+def _fragment_context(name, laundry):
+    if name == 'gallery':
+        return {'laundry': laundry, 'images': list(laundry.images.all()[:15])}
+    # Halaman pertama feed ulasan; halaman berikutnya lewat laundry_reviews_api
+    reviews, next_cursor = review_feed.paginate_reviews(review_feed.approved_reviews(laundry))
+    return {
+        'laundry': laundry,
+        'rating_breakdown': rating_stats.histogram(laundry),
+        'reviews': reviews,
+        'next_cursor': next_cursor,
+    }
+
+
+def _count(key, delta):
+    if not delta:
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # Counter belum ada; add() bisa kalah balapan dengan worker lain
+        if not cache.add(key, delta, None):
+            cache.incr(key, delta)
+
+
+def flush_counters():
+    """Tulis counter hit/miss worker ini ke cache bersama"""
+    with _counter_lock:
+        hits, misses = _pending['hits'], _pending['misses']
+        _pending.update(hits=0, misses=0, flushed_at=time.monotonic())
+    _count(HITS_KEY, hits)
+    _count(MISSES_KEY, misses)
+
+
+def _record(hits, misses):
+    with _counter_lock:
+        _pending['hits'] += hits
+        _pending['misses'] += misses
+        due = time.monotonic() - _pending['flushed_at'] >= COUNTER_FLUSH_INTERVAL
+    if due:
+        flush_counters()
+
+
+def fragments_for(laundry):
+    """{nama fragment: html} untuk laundry, diambil dari cache jika version masih sama"""
+    version = get_version(version_key(laundry.id))
+    keys = {name: f'laundry_detail:{laundry.id}:{version}:{name}' for name in FRAGMENT_TEMPLATES}
+    cached = cache.get_many(keys.values())
+
+    fragments = {}
+    rendered = {}
+    for name, key in keys.items():
+        if key in cached:
+            fragments[name] = mark_safe(cached[key])
+        else:
+            html = render_to_string(FRAGMENT_TEMPLATES[name], _fragment_context(name, laundry))
+            rendered[key] = str(html)
+            fragments[name] = html
+    if rendered:
+        cache.set_many(rendered, CACHE_TIMEOUT)
+
+    _record(len(keys) - len(rendered), len(rendered))
+    return fragments
+
+
+def stats():
+    """Jumlah hit & miss fragment sejak reset terakhir (sampai flush terakhir tiap worker)"""
+    flush_counters()
+    counts = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = counts.get(HITS_KEY, 0), counts.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total if total else 0.0,
+    }
+
+
+def reset_stats():
+    flush_counters()
+    cache.delete_many([HITS_KEY, MISSES_KEY])
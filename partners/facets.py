@@ -0,0 +1,138 @@
+"""Facet filter listing laundry (layanan, rentang harga, status, rating minimum).
+
+Semua jumlah per facet dihitung dengan satu query aggregate bersyarat
+(COUNT ... FILTER / SUM(CASE ...)). Ringkasan tanpa filter per kota disimpan di
+cache dengan version key yang dinaikkan setiap Laundry berubah.
+
+Saat listing difilter, jumlah grup pilihan tunggal / OR (rentang harga, status,
+rating minimum) dihitung dengan semua filter kecuali filter grup itu sendiri,
+jadi opsi lain di grup yang sama tetap menunjukkan berapa hasil yang akan
+ditambahkan. Layanan digabung dengan AND, jadi jumlahnya tetap memakai filter
+layanan yang sudah dipilih.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Q
+from core.cache_versions import get_version, bump_version
+
+VERSION_KEY = 'laundry_facets:version'
+CACHE_TIMEOUT = 60 * 60
+
+# Nama filter layanan di query string -> field boolean Laundry
+SERVICE_FACETS = {
+    'regular_wash': 'has_regular_wash',
+    'dry_clean': 'has_dry_clean',
+    'express': 'has_express',
+}
+
+# (key, label, harga minimum inklusif, harga maksimum eksklusif)
+PRICE_BANDS = [
+    ('lt5000', '< Rp 5.000', None, 5000),
+    ('5000-7000', 'Rp 5.000 - 7.000', 5000, 7000),
+    ('7000-10000', 'Rp 7.000 - 10.000', 7000, 10000),
+    ('gte10000', '≥ Rp 10.000', 10000, None),
+]
+
+# (key, label, rating minimum)
+RATING_MINIMUMS = [
+    ('4.5', '4.5+', 4.5),
+    ('4', '4.0+', 4.0),
+    ('3', '3.0+', 3.0),
+]
+
+# Grup facet yang jumlahnya tidak dibatasi oleh pilihan di grup itu sendiri
+EXCLUSIVE_GROUPS = ('price', 'status', 'rating')
+
+
+def invalidate():
+    bump_version(VERSION_KEY)
+
+
+def price_band_q(key):
+    """Q untuk satu rentang harga; ValueError jika key tidak dikenal"""
+    for band_key, _, low, high in PRICE_BANDS:
+        if band_key == key:
+            q = Q()
+            if low is not None:
+                q &= Q(price_per_kg__gte=low)
+            if high is not None:
+                q &= Q(price_per_kg__lt=high)
+            return q
+    raise ValueError(f'Rentang harga tidak dikenal: {key}')
+
+
+def rating_minimum(key):
+    for rating_key, _, minimum in RATING_MINIMUMS:
+        if rating_key == key:
+            return minimum
+    raise ValueError(f'Rating minimum tidak dikenal: {key}')
+
+
+def _all(conditions):
+    """AND dari list Q, None jika kosong (Count tanpa filter)"""
+    combined = None
+    for condition in conditions:
+        combined = condition if combined is None else combined & condition
+    return combined
+
+
+def _aggregates(conditions):
+    """Alias aggregate -> Count bersyarat untuk setiap nilai facet"""
+    from .models import Laundry
+
+    def count(group, condition):
+        scope = [q for name, q in conditions.items() if not (name == group and group in EXCLUSIVE_GROUPS)]
+        return Count('id', filter=_all([*scope, condition]))
+
+    aggregates = {'total': Count('id', filter=_all(conditions.values()))}
+    for key, field in SERVICE_FACETS.items():
+        aggregates[f'service__{key}'] = count('services', Q(**{field: True}))
+    for key, _, _, _ in PRICE_BANDS:
+        aggregates[f'price__{key}'] = count('price', price_band_q(key))
+    for key, _ in Laundry.STATUS_CHOICES:
+        aggregates[f'status__{key}'] = count('status', Q(status=key))
+    for key, _, minimum in RATING_MINIMUMS:
+        aggregates[f'rating__{key}'] = count('rating', Q(rating__gte=minimum))
+    return aggregates
+
+
+def compute_facets(queryset, conditions=None):
+    """Jumlah laundry per nilai facet untuk queryset, dalam satu query.
+
+    `conditions` ({grup: Q}, dari listing.filter_conditions) adalah filter
+    listing yang belum diterapkan ke queryset; 'total' memakai semuanya.
+    """
+    from .models import Laundry
+
+    counts = queryset.order_by().aggregate(**_aggregates(conditions or {}))
+    return {
+        'total': counts['total'],
+        'services': [
+            {'key': key, 'label': Laundry._meta.get_field(field).verbose_name,
+             'count': counts[f'service__{key}']}
+            for key, field in SERVICE_FACETS.items()
+        ],
+        'price': [
+            {'key': key, 'label': label, 'count': counts[f'price__{key}']}
+            for key, label, _, _ in PRICE_BANDS
+        ],
+        'status': [
+            {'key': key, 'label': label, 'count': counts[f'status__{key}']}
+            for key, label in Laundry.STATUS_CHOICES
+        ],
+        'rating': [
+            {'key': key, 'label': label, 'count': counts[f'rating__{key}']}
+            for key, label, _ in RATING_MINIMUMS
+        ],
+    }
+
+
+def city_facets(city):
+    """Ringkasan facet laundry aktif satu kota (tanpa filter), dari cache jika ada"""
+    from .models import Laundry
+
+    key = f'laundry_facets:{get_version(VERSION_KEY)}:{city}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(Laundry.objects.filter(is_active=True, city=city))
+        cache.set(key, facets, CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,49 @@
+"""Utilitas geospasial untuk pencarian laundry terdekat"""
+from math import radians, sin, cos, sqrt, atan2, isfinite
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEG_LAT = 111.32
+
+# Radius default pencarian "terdekat" = batas tarif COD terjauh
+DEFAULT_NEARBY_RADIUS_KM = 20
+
+# Pusat kota Yogyakarta, dipakai jika lokasi user belum diketahui
+DEFAULT_LOCATION = (-7.797068, 110.370529)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Jarak great-circle antara dua titik dalam km"""
+    lat1, lon1, lat2, lon2 = map(radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+
+def is_valid_location(lat, lon):
+    """True jika (lat, lon) berhingga dan di dalam rentang -90..90 / -180..180"""
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return False
+    return isfinite(lat) and isfinite(lon) and -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def bounding_box(lat, lon, radius_km):
+    """(min_lat, max_lat, min_lon, max_lon) yang melingkupi lingkaran radius_km"""
+    lat, lon, radius_km = float(lat), float(lon), float(radius_km)
+    if not (isfinite(lat) and isfinite(lon) and isfinite(radius_km)):
+        raise ValueError('Koordinat atau radius tidak valid')
+    dlat = radius_km / KM_PER_DEG_LAT
+    # Di dekat kutub lingkaran bisa mencakup semua bujur; tidak perlu lebih dari 180°
+    dlon = min(radius_km / max(KM_PER_DEG_LAT * cos(radians(lat)), 1e-6), 180.0)
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+
+def user_location_from_session(session, default=None):
+    """Ambil (lat, lon) user dari session; `default` jika belum ada / tidak valid"""
+    lat = session.get('user_latitude')
+    lon = session.get('user_longitude')
+    if not is_valid_location(lat, lon):
+        return default
+    return float(lat), float(lon)
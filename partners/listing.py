@@ -0,0 +1,252 @@
+"""Listing laundry marketplace dengan keyset (cursor) pagination"""
+from django.db.models import Q
+from decimal import Decimal, InvalidOperation
+from core import images as image_derivatives
+from core.cache_versions import bump_version
+from . import geo, facets, ranking
+import base64
+import json
+
+LISTING_PAGE_SIZE = 24
+LISTING_MAX_PAGE_SIZE = 50
+
+# Kota listing dashboard dan default parameter `city` API listing / pencarian
+DEFAULT_CITY = 'Yogyakarta'
+
+# Version isi listing (data laundry, foto, rating) untuk ETag listing API
+VERSION_KEY = 'laundry_listing:version'
+
+
+def invalidate():
+    bump_version(VERSION_KEY)
+
+
+def encode_cursor(values):
+    """Encode nilai key urutan baris terakhir menjadi token cursor"""
+    raw = json.dumps([str(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Kebalikan encode_cursor; ValueError jika token rusak"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('Cursor tidak valid')
+    if not isinstance(values, list):
+        raise ValueError('Cursor tidak valid')
+    return values
+
+
+def _split(params, name):
+    return [value for value in params.get(name, '').split(',') if value]
+
+
+def has_filters(params):
+    """True jika query string berisi filter yang mempersempit listing"""
+    names = ('min_price', 'max_price', 'services', 'price_band', 'status', 'min_rating', 'open_now', 'max_distance')
+    return any(params.get(name) for name in names)
+
+
+def filter_conditions(params, model):
+    """{grup facet: Q} untuk filter harga, layanan, status, rating dan jam buka dari query string.
+
+    Beberapa nilai price_band / status (dipisah koma) digabung dengan OR,
+    sedangkan services harus dimiliki semuanya. Grup yang tidak diisi tidak ada
+    di hasil. Kunci 'services', 'price', 'status' dan 'rating' sama dengan grup
+    di facets.compute_facets().
+    """
+    conditions = {}
+    try:
+        price_range = Q()
+        if params.get('min_price'):
+            price_range &= Q(price_per_kg__gte=Decimal(params['min_price']))
+        if params.get('max_price'):
+            price_range &= Q(price_per_kg__lte=Decimal(params['max_price']))
+    except InvalidOperation:
+        raise ValueError('Filter harga tidak valid')
+    if price_range:
+        conditions['price_range'] = price_range
+
+    services = _split(params, 'services')
+    if services:
+        condition = Q()
+        for service in services:
+            if service not in facets.SERVICE_FACETS:
+                raise ValueError(f'Layanan tidak dikenal: {service}')
+            condition &= Q(**{facets.SERVICE_FACETS[service]: True})
+        conditions['services'] = condition
+
+    price_bands = _split(params, 'price_band')
+    if price_bands:
+        condition = Q()
+        for band in price_bands:
+            condition |= facets.price_band_q(band)
+        conditions['price'] = condition
+
+    statuses = _split(params, 'status')
+    if statuses:
+        valid_statuses = {key for key, _ in model.STATUS_CHOICES}
+        if not valid_statuses.issuperset(statuses):
+            raise ValueError('Status tidak dikenal')
+        conditions['status'] = Q(status__in=statuses)
+
+    min_rating = params.get('min_rating')
+    if min_rating:
+        conditions['rating'] = Q(rating__gte=facets.rating_minimum(min_rating))
+
+    # is_open_now dijaga oleh sweeper jadwal (partners.schedule.sweep)
+    if params.get('open_now') in ('1', 'true'):
+        conditions['open_now'] = Q(is_open_now=True)
+
+    return conditions
+
+
+def _filter_distance(queryset, params, user_location):
+    max_distance = params.get('max_distance')
+    if max_distance and user_location:
+        try:
+            queryset = queryset.nearby(*user_location, radius_km=float(max_distance))
+        except ValueError:
+            raise ValueError('Filter jarak tidak valid')
+    return queryset
+
+
+def filter_laundries(queryset, params, user_location=None):
+    """Terapkan semua filter query string (filter_conditions() dan jarak maksimum)"""
+    for condition in filter_conditions(params, queryset.model).values():
+        queryset = queryset.filter(condition)
+    return _filter_distance(queryset, params, user_location)
+
+
+def facet_counts(queryset, params, user_location=None):
+    """Jumlah per facet untuk listing terfilter; lihat facets.compute_facets()"""
+    conditions = filter_conditions(params, queryset.model)
+    return facets.compute_facets(_filter_distance(queryset, params, user_location), conditions)
+
+
+def paginate_laundries(queryset, cursor=None, page_size=LISTING_PAGE_SIZE, sort='rating', user_location=None,
+                       city=None):
+    """Ambil satu halaman laundry setelah `cursor`.
+
+    sort='rating' mengikuti Laundry.Meta.ordering (rating, total_orders_completed,
+    id menurun); sort='distance' butuh user_location (distance, id menaik);
+    sort='top' mengikuti leaderboard partners.ranking untuk `city` (rank menaik),
+    lalu laundry yang belum masuk refresh ranking terakhir (baru dibuat atau baru
+    diaktifkan) di belakangnya, urut id.
+    Setiap halaman hanya membaca page_size + 1 baris dari posisi cursor, jadi
+    halaman ke-N sama murahnya dengan halaman pertama.
+
+    Mengembalikan (list laundry, next_cursor atau None).
+    """
+    if sort == 'distance':
+        if not user_location:
+            raise ValueError('Urutan jarak membutuhkan lokasi user')
+        if 'distance' not in queryset.query.annotations:
+            queryset = queryset.with_distance(*user_location)
+        # Laundry tanpa koordinat tidak punya jarak, tidak bisa diurutkan
+        queryset = queryset.exclude(latitude=None).exclude(longitude=None).order_by('distance', 'id')
+        if cursor:
+            try:
+                distance, last_id = decode_cursor(cursor)
+                distance, last_id = float(distance), int(last_id)
+            except (TypeError, ValueError):
+                raise ValueError('Cursor tidak valid')
+            queryset = queryset.filter(
+                Q(distance__gt=distance) | Q(distance=distance, id__gt=last_id)
+            )
+        key = lambda laundry: (laundry.distance, laundry.id)
+    elif sort == 'top':
+        if not city:
+            raise ValueError('Urutan top membutuhkan kota')
+        last_rank, last_id = None, None
+        if cursor:
+            try:
+                last_rank, last_id = decode_cursor(cursor)
+                last_rank, last_id = (int(last_rank) if last_rank else None), int(last_id)
+            except (TypeError, ValueError):
+                raise ValueError('Cursor tidak valid')
+        # Dua query keyset: leaderboard lewat index (city, district, rank), lalu
+        # laundry tanpa ranking lewat primary key; tidak ada sort gabungan
+        rows = []
+        if not cursor or last_rank is not None:
+            ranked = ranking.ranked(queryset, city)
+            if last_rank is not None:
+                ranked = ranked.filter(rank__gt=last_rank)
+            rows = list(ranked[:page_size + 1])
+            last_id = None
+        if len(rows) <= page_size:
+            unranked = ranking.unranked(queryset, city)
+            if last_id is not None:
+                unranked = unranked.filter(id__gt=last_id)
+            rows += list(unranked[:page_size + 1 - len(rows)])
+        key = lambda laundry: ('' if laundry.rank is None else laundry.rank, laundry.id)
+        return _page(rows, page_size, key)
+    elif sort == 'rating':
+        queryset = queryset.order_by('-rating', '-total_orders_completed', '-id')
+        if cursor:
+            try:
+                rating, orders_completed, last_id = decode_cursor(cursor)
+                rating, orders_completed, last_id = Decimal(rating), int(orders_completed), int(last_id)
+            except (TypeError, ValueError, InvalidOperation):
+                raise ValueError('Cursor tidak valid')
+            queryset = queryset.filter(
+                Q(rating__lt=rating)
+                | Q(rating=rating, total_orders_completed__lt=orders_completed)
+                | Q(rating=rating, total_orders_completed=orders_completed, id__lt=last_id)
+            )
+        key = lambda laundry: (laundry.rating, laundry.total_orders_completed, laundry.id)
+    else:
+        raise ValueError(f'Urutan tidak dikenal: {sort}')
+
+    return _page(list(queryset[:page_size + 1]), page_size, key)
+
+
+def _page(rows, page_size, key):
+    """(halaman, next_cursor) dari page_size + 1 baris pertama setelah cursor"""
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(key(rows[-1]))
+    return rows, None
+
+
+def serialize_laundry(laundry):
+    """Data laundry untuk JSON listing (sama dengan data kartu di dashboard)"""
+    distance = getattr(laundry, 'distance', None)
+    return {
+        'id': laundry.id,
+        'lat': float(laundry.latitude) if laundry.latitude is not None else None,
+        'lon': float(laundry.longitude) if laundry.longitude is not None else None,
+        'name': laundry.name,
+        'address': laundry.address,
+        'district': laundry.district,
+        'city': laundry.city,
+        'price': float(laundry.price_per_kg),
+        'rating': float(laundry.rating),
+        'status': laundry.status,
+        'distance': distance,
+        'pickupTime': laundry.estimated_pickup_time,
+        'deliveryTime': laundry.estimated_delivery_time,
+        'images': [image_derivatives.url_for(image, 'image') for image in laundry.images.all()],
+    }
+
+
+def parse_page_size(value):
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        return LISTING_PAGE_SIZE
+    return max(1, min(page_size, LISTING_MAX_PAGE_SIZE))
+
+
+def user_location_from_request(request):
+    """Lokasi dari query string (lat/lon) atau dari session.
+
+    lat/lon yang tidak valid (bukan angka, nan/inf, di luar rentang) diabaikan
+    dan lokasi session yang dipakai.
+    """
+    lat, lon = request.GET.get('lat'), request.GET.get('lon')
+    if lat and lon and geo.is_valid_location(lat, lon):
+        return float(lat), float(lon)
+    return geo.user_location_from_session(request.session)
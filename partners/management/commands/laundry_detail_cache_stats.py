@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from partners import detail_cache
+
+
+class Command(BaseCommand):
+    help = 'Tampilkan jumlah hit/miss fragment cache halaman detail laundry'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset counter setelah ditampilkan')
+
+    def handle(self, *args, **options):
+        stats = detail_cache.stats()
+        self.stdout.write(
+            f"Hit: {stats['hits']}  Miss: {stats['misses']}  Hit rate: {stats['hit_rate']:.1%}"
+        )
+        if options['reset']:
+            detail_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counter direset'))
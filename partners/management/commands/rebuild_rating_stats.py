@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from partners import rating_stats
+
+
+class Command(BaseCommand):
+    help = ('Rekonsiliasi statistik rating semua laundry (histogram, rating_sum, total_reviews, rating) '
+            'dari tabel reviews dengan satu GROUP BY')
+
+    def handle(self, *args, **options):
+        total = rating_stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Statistik rating dihitung ulang; {total} laundry punya review'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from partners.models import Laundry, LaundrySearchToken
+from partners import search
+
+
+class Command(BaseCommand):
+    help = 'Bangun ulang tabel token pencarian laundry (laundry_search_tokens)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Jumlah laundry per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        laundries = Laundry.objects.only('id', *search.INDEXED_FIELDS).order_by('id')
+
+        total = 0
+        last_id = 0
+        LaundrySearchToken.objects.all().delete()
+        while True:
+            batch = list(laundries.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            rows = [
+                LaundrySearchToken(laundry_id=laundry.id, kind=kind, token=token, weight=weight)
+                for laundry in batch
+                for (kind, token), weight in search.tokens_for_laundry(laundry).items()
+            ]
+            LaundrySearchToken.objects.bulk_create(rows, batch_size=1000)
+            total += len(batch)
+            last_id = batch[-1].id
+
+        self.stdout.write(self.style.SUCCESS(f'Index pencarian dibangun ulang untuk {total} laundry'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from partners import ranking
+import time
+
+
+class Command(BaseCommand):
+    help = 'Hitung ulang leaderboard laundry per kota & kecamatan (tabel laundry_rankings)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Jalan terus, refresh setiap --interval detik')
+        parser.add_argument('--interval', type=int, default=15 * 60,
+                            help='Jeda antar refresh dalam mode loop (detik)')
+
+    def handle(self, *args, **options):
+        while True:
+            rows = ranking.refresh()
+            self.stdout.write(self.style.SUCCESS(f'{timezone.localtime():%Y-%m-%d %H:%M} {rows} baris ranking'))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
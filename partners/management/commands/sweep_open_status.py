@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from partners import schedule
+import time
+
+
+class Command(BaseCommand):
+    help = 'Sinkronkan Laundry.is_open_now & status dengan jadwal operasional'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Jalan terus, bangun setiap ada jam buka/tutup berikutnya')
+        parser.add_argument('--max-sleep', type=int, default=60,
+                            help='Jeda maksimum antar sweep dalam mode loop (detik), '
+                                 'agar perubahan jam operasional cepat terbaca')
+
+    def handle(self, *args, **options):
+        while True:
+            opened, closed = schedule.sweep()
+            if opened or closed or not options['loop']:
+                self.stdout.write(f'{timezone.localtime():%Y-%m-%d %H:%M} buka: {opened}, tutup: {closed}')
+            if not options['loop']:
+                return
+
+            boundary = schedule.next_boundary()
+            sleep = options['max_sleep']
+            if boundary is not None:
+                sleep = min(sleep, max((boundary - timezone.now()).total_seconds(), 1))
+            time.sleep(sleep)
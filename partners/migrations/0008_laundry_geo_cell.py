@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:37
+
+from django.db import migrations, models
+from math import floor
+
+# Salinan partners.geo.grid_cell saat migrasi ini dibuat
+GRID_CELL_DEG = 0.05
+
+
+def grid_cell(lat, lon):
+    return f'{floor(float(lat) / GRID_CELL_DEG)}:{floor(float(lon) / GRID_CELL_DEG)}'
+
+
+def populate_geo_cell(apps, schema_editor):
+    Laundry = apps.get_model('partners', 'Laundry')
+    laundries = list(Laundry.objects.exclude(latitude=None).exclude(longitude=None).only('id', 'latitude', 'longitude'))
+    for laundry in laundries:
+        laundry.geo_cell = grid_cell(laundry.latitude, laundry.longitude)
+    Laundry.objects.bulk_update(laundries, ['geo_cell'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partners', '0007_alter_laundry_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laundry',
+            name='geo_cell',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=20, verbose_name='Sel Grid Lokasi'),
+        ),
+        migrations.RunPython(populate_geo_cell, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partners', '0008_laundry_geo_cell'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='laundry',
+            index=models.Index(fields=['latitude', 'longitude'], name='laundry_lat_lon_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partners', '0009_laundry_lat_lon_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='laundry',
+            index=models.Index(fields=['city', '-rating', '-total_orders_completed', '-id'], name='laundry_listing_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:44
+
+import django.db.models.deletion
+import re
+import unicodedata
+from django.db import migrations, models
+
+# Salinan aturan tokenisasi partners.search saat migrasi ini dibuat; migrasi
+# tidak boleh bergantung pada kode aplikasi yang bisa berubah
+FIELD_WEIGHTS = {'name': 3, 'district': 2, 'city': 2, 'address': 1}
+STOPWORDS = {'laundry', 'jl', 'jln', 'jalan', 'no', 'rt', 'rw', 'kec', 'kab', 'kota', 'gg', 'dan', 'di'}
+TOKEN_MAX_LENGTH = 40
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def words(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return [w for w in WORD_RE.findall(text) if len(w) > 1 and w not in STOPWORDS]
+
+
+def tokens_for_laundry(laundry):
+    tokens = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for word in words(getattr(laundry, field)):
+            key = ('w', word[:TOKEN_MAX_LENGTH])
+            tokens[key] = max(tokens.get(key, 0), weight)
+            padded = f' {word} '
+            for i in range(len(padded) - 2):
+                tokens.setdefault(('t', padded[i:i + 3]), 1)
+    return tokens
+
+
+def build_search_index(apps, schema_editor):
+    Laundry = apps.get_model('partners', 'Laundry')
+    LaundrySearchToken = apps.get_model('partners', 'LaundrySearchToken')
+    rows = [
+        LaundrySearchToken(laundry_id=laundry.id, kind=kind, token=token, weight=weight)
+        for laundry in Laundry.objects.only('id', 'name', 'address', 'district', 'city').iterator()
+        for (kind, token), weight in tokens_for_laundry(laundry).items()
+    ]
+    LaundrySearchToken.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partners', '0010_laundry_listing_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LaundrySearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('w', 'Kata'), ('t', 'Trigram')], max_length=1)),
+                ('token', models.CharField(max_length=40)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('laundry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='partners.laundry')),
+            ],
+            options={
+                'verbose_name': 'Laundry Search Token',
+                'verbose_name_plural': 'Laundry Search Tokens',
+                'db_table': 'laundry_search_tokens',
+                'indexes': [models.Index(fields=['kind', 'token', 'laundry'], name='search_token_lookup_idx')],
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
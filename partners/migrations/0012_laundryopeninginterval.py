@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Salinan partners.schedule.weekly_intervals saat migrasi ini dibuat
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def weekly_intervals(opens, closes):
+    start = opens.hour * 60 + opens.minute
+    end = closes.hour * 60 + closes.minute
+    if start == end:
+        return [(0, MINUTES_PER_WEEK)]
+
+    length = (end - start) % MINUTES_PER_DAY
+    intervals = []
+    for day in range(7):
+        day_start = day * MINUTES_PER_DAY + start
+        day_end = day_start + length
+        if day_end <= MINUTES_PER_WEEK:
+            intervals.append((day_start, day_end))
+        else:
+            intervals.append((day_start, MINUTES_PER_WEEK))
+            intervals.append((0, day_end - MINUTES_PER_WEEK))
+    return intervals
+
+
+def build_schedule_index(apps, schema_editor):
+    Laundry = apps.get_model('partners', 'Laundry')
+    LaundryOpeningInterval = apps.get_model('partners', 'LaundryOpeningInterval')
+    rows = [
+        LaundryOpeningInterval(laundry_id=laundry.id, start_minute=start, end_minute=end)
+        for laundry in Laundry.objects.only('id', 'operating_hours_start', 'operating_hours_end').iterator()
+        for start, end in weekly_intervals(laundry.operating_hours_start, laundry.operating_hours_end)
+    ]
+    LaundryOpeningInterval.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partners', '0011_laundrysearchtoken'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='laundry',
+            name='is_open_now',
+            field=models.BooleanField(db_index=True, default=True),
+        ),
+        migrations.CreateModel(
+            name='LaundryOpeningInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_minute', models.PositiveIntegerField()),
+                ('end_minute', models.PositiveIntegerField()),
+                ('laundry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opening_intervals', to='partners.laundry')),
+            ],
+            options={
+                'verbose_name': 'Laundry Opening Interval',
+                'verbose_name_plural': 'Laundry Opening Intervals',
+                'db_table': 'laundry_opening_intervals',
+                'indexes': [models.Index(fields=['start_minute', 'end_minute'], name='opening_interval_range_idx'), models.Index(fields=['laundry', 'start_minute'], name='opening_interval_laundry_idx')],
+            },
+        ),
+        migrations.RunPython(build_schedule_index, migrations.RunPython.noop),
+    ]
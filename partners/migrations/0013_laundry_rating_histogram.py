@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:49
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_rating_histogram(apps, schema_editor):
+    Laundry = apps.get_model('partners', 'Laundry')
+    Review = apps.get_model('orders', 'Review')
+
+    laundries = {}
+    rows = Review.objects.filter(is_approved=True).values('laundry_id', 'rating').annotate(total=Count('id')).order_by()
+    for row in rows:
+        if 1 <= row['rating'] <= 5:
+            laundry = laundries.setdefault(row['laundry_id'], Laundry(pk=row['laundry_id']))
+            setattr(laundry, f"rating_count_{row['rating']}", row['total'])
+    Laundry.objects.bulk_update(
+        laundries.values(),
+        [f'rating_count_{star}' for star in range(1, 6)],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partners', '0012_laundryopeninginterval'),
+        ('orders', '0007_review'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laundry',
+            name='rating_count_1',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='laundry',
+            name='rating_count_2',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='laundry',
+            name='rating_count_3',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='laundry',
+            name='rating_count_4',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='laundry',
+            name='rating_count_5',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_rating_histogram, migrations.RunPython.noop),
+    ]
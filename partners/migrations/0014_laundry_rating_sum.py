@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:51
+
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import migrations, models
+from django.db.models import Count
+
+STARS = range(1, 6)
+STATS_FIELDS = [*(f'rating_count_{star}' for star in STARS), 'rating_sum', 'total_reviews', 'rating']
+
+
+def average_rating(rating_sum, total):
+    # Salinan partners.rating_stats.average_rating saat migrasi ini dibuat
+    if not total:
+        return Decimal('0.0')
+    return (Decimal(rating_sum) / total).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP)
+
+
+def populate_rating_sum(apps, schema_editor):
+    """Hitung ulang statistik rating semua laundry dari review approved.
+
+    total_reviews dan rating hasil seed (tanpa baris review) ikut di-reset, agar
+    histogram, rating_sum dan total_reviews selalu menggambarkan review yang sama;
+    jika tidak, review pertama dirata-rata terhadap total_reviews palsu.
+    """
+    Laundry = apps.get_model('partners', 'Laundry')
+    Review = apps.get_model('orders', 'Review')
+
+    counts = {}
+    rows = Review.objects.filter(is_approved=True, rating__in=STARS).values('laundry_id', 'rating').annotate(
+        total=Count('id')
+    ).order_by()
+    for row in rows:
+        counts.setdefault(row['laundry_id'], {})[row['rating']] = row['total']
+
+    laundries = []
+    for laundry_id, stars in counts.items():
+        laundry = Laundry(pk=laundry_id)
+        for star in STARS:
+            setattr(laundry, f'rating_count_{star}', stars.get(star, 0))
+        laundry.rating_sum = sum(star * total for star, total in stars.items())
+        laundry.total_reviews = sum(stars.values())
+        laundry.rating = average_rating(laundry.rating_sum, laundry.total_reviews)
+        laundries.append(laundry)
+
+    Laundry.objects.update(rating=0, **{field: 0 for field in STATS_FIELDS if field != 'rating'})
+    Laundry.objects.bulk_update(laundries, STATS_FIELDS, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partners', '0013_laundry_rating_histogram'),
+        ('orders', '0007_review'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laundry',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_rating_sum, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:02
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partners', '0015_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='laundryimage',
+            name='image',
+            field=models.ImageField(storage=core.storage.ContentAddressedStorage(), upload_to='laundry_images/%Y/%m/', verbose_name='Gambar'),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:06
+
+import django.db.models.deletion
+import math
+from collections import defaultdict
+from django.db import migrations, models
+
+# Salinan rumus partners.ranking saat migrasi ini dibuat
+PRIOR_REVIEWS = 10
+ORDERS_WEIGHT = 0.25
+CITY_WIDE = ''
+RANKING_FIELDS = ('id', 'city', 'district', 'rating_sum', 'total_reviews', 'total_orders_completed')
+
+
+def compute_rankings(laundries):
+    laundries = list(laundries)
+    totals = defaultdict(lambda: [0, 0])
+    for laundry in laundries:
+        totals[laundry['city']][0] += laundry['rating_sum']
+        totals[laundry['city']][1] += laundry['total_reviews']
+    all_sum = sum(rating_sum for rating_sum, _ in totals.values())
+    all_reviews = sum(count for _, count in totals.values())
+    global_mean = all_sum / all_reviews if all_reviews else 0.0
+
+    areas = defaultdict(list)
+    for laundry in laundries:
+        city_sum, city_reviews = totals[laundry['city']]
+        prior_mean = city_sum / city_reviews if city_reviews else global_mean
+        bayes = (PRIOR_REVIEWS * prior_mean + laundry['rating_sum']) / (PRIOR_REVIEWS + laundry['total_reviews'])
+        entry = (bayes + ORDERS_WEIGHT * math.log10(1 + laundry['total_orders_completed']), laundry['id'])
+        areas[(laundry['city'], CITY_WIDE)].append(entry)
+        if laundry['district']:
+            areas[(laundry['city'], laundry['district'])].append(entry)
+
+    rows = []
+    for (city, district), entries in areas.items():
+        entries.sort(key=lambda entry: (-entry[0], entry[1]))
+        rows.extend(
+            (city, district, rank, laundry_id, round(value, 4))
+            for rank, (value, laundry_id) in enumerate(entries, start=1)
+        )
+    return rows
+
+
+def build_rankings(apps, schema_editor):
+    Laundry = apps.get_model('partners', 'Laundry')
+    LaundryRanking = apps.get_model('partners', 'LaundryRanking')
+    laundries = Laundry.objects.filter(is_active=True).values(*RANKING_FIELDS).order_by()
+    LaundryRanking.objects.bulk_create([
+        LaundryRanking(city=city, district=district, rank=rank, laundry_id=laundry_id, score=value)
+        for city, district, rank, laundry_id, value in compute_rankings(laundries)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partners', '0016_laundryimage_content_addressed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LaundryRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(max_length=100)),
+                ('district', models.CharField(blank=True, default='', max_length=100)),
+                ('rank', models.PositiveIntegerField()),
+                ('score', models.FloatField()),
+                ('laundry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='partners.laundry')),
+            ],
+            options={
+                'verbose_name': 'Laundry Ranking',
+                'verbose_name_plural': 'Laundry Rankings',
+                'db_table': 'laundry_rankings',
+                'constraints': [models.UniqueConstraint(fields=('city', 'district', 'rank'), name='laundry_ranking_position_uniq')],
+            },
+        ),
+        migrations.RunPython(build_rankings, migrations.RunPython.noop),
+    ]
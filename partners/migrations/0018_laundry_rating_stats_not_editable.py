@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:23
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partners', '0017_laundry_ranking'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='laundry',
+            name='rating',
+            field=models.DecimalField(decimal_places=1, default=0.0, editable=False, max_digits=3, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.AlterField(
+            model_name='laundry',
+            name='total_reviews',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:36
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partners', '0018_laundry_rating_stats_not_editable'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='laundry',
+            name='geo_cell',
+        ),
+    ]
@@ -1,7 +1,13 @@
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Round, Sin, Sqrt
 from django.utils import timezone
+from decimal import Decimal
+from core.storage import content_addressed_storage
+from . import geo, schedule, rating_stats
+from math import radians
 import re
 
 class MitraRequest(models.Model):
@@ -48,6 +54,51 @@ class MitraProfile(models.Model):
         verbose_name = 'Mitra Profile'
         verbose_name_plural = 'Mitra Profiles'
 
+class LaundryQuerySet(models.QuerySet):
+    """Query laundry berbasis lokasi: prefilter bounding box lewat index (latitude, longitude)"""
+    
+    def in_bounding_box(self, lat, lon, radius_km):
+        """Prefilter kotak lat/lon yang bisa dijawab index (latitude, longitude)"""
+        min_lat, max_lat, min_lon, max_lon = geo.bounding_box(lat, lon, radius_km)
+        return self.filter(latitude__range=(min_lat, max_lat), longitude__range=(min_lon, max_lon))
+    
+    def with_distance(self, lat, lon):
+        """Anotasi `distance` (km, 2 desimal) dihitung haversine di database"""
+        lat1 = Value(radians(float(lat)), output_field=FloatField())
+        lon1 = Value(radians(float(lon)), output_field=FloatField())
+        lat2 = Radians(F('latitude'), output_field=FloatField())
+        lon2 = Radians(F('longitude'), output_field=FloatField())
+        a = (
+            Power(Sin((lat2 - lat1) / 2), 2)
+            + Cos(lat1) * Cos(lat2) * Power(Sin((lon2 - lon1) / 2), 2)
+        )
+        return self.annotate(
+            distance=Round(
+                2 * geo.EARTH_RADIUS_KM * ASin(Least(Sqrt(a), Value(1.0))), 2, output_field=FloatField()
+            )
+        )
+    
+    def nearby(self, lat, lon, radius_km=geo.DEFAULT_NEARBY_RADIUS_KM):
+        """Laundry dalam radius_km, urut jarak terdekat.
+        
+        Filter, urutan dan LIMIT (slice) semuanya dikerjakan database: bounding
+        box dulu lewat index, lalu jarak haversine untuk sisa baris.
+        """
+        return (
+            self.in_bounding_box(lat, lon, radius_km)
+            .with_distance(lat, lon)
+            .filter(distance__lte=radius_km)
+            .order_by('distance', 'id')
+        )
+    
+    def open_at(self, when=None):
+        """Laundry yang buka pada `when` (default: sekarang) menurut index jadwal.
+        
+        Untuk listing biasa cukup filter is_open_now yang dijaga sweeper.
+        """
+        return self.filter(schedule.open_at_q(when))
+
+
 class Laundry(models.Model):
     """Detail laundry dari mitra - marketplace listing"""
     mitra = models.ForeignKey(MitraProfile, on_delete=models.CASCADE, related_name='laundries')
@@ -82,12 +133,21 @@ class Laundry(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='buka', verbose_name='Status')
     
     # Rating & Status
-    rating = models.DecimalField(max_digits=3, decimal_places=1, default=0.0,
+    rating = models.DecimalField(max_digits=3, decimal_places=1, default=0.0, editable=False,
                                 validators=[MinValueValidator(0), MaxValueValidator(5)])
-    total_reviews = models.IntegerField(default=0)
+    total_reviews = models.IntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
     total_orders_completed = models.IntegerField(default=0)
+    
+    # Histogram rating (review approved per bintang); bersama rating_sum, total_reviews
+    # dan rating dijaga secara inkremental oleh partners.rating_stats
+    rating_count_1 = models.PositiveIntegerField(default=0, editable=False)
+    rating_count_2 = models.PositiveIntegerField(default=0, editable=False)
+    rating_count_3 = models.PositiveIntegerField(default=0, editable=False)
+    rating_count_4 = models.PositiveIntegerField(default=0, editable=False)
+    rating_count_5 = models.PositiveIntegerField(default=0, editable=False)
     is_active = models.BooleanField(default=True)
-    is_open_now = models.BooleanField(default=True)
+    is_open_now = models.BooleanField(default=True, db_index=True)
     
     # Layanan tersedia
     has_regular_wash = models.BooleanField(default=True, verbose_name='Cuci Setrika')
@@ -97,6 +157,8 @@ class Laundry(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = LaundryQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.name} - {self.district}"
     
@@ -106,6 +168,13 @@ class Laundry(models.Model):
             coords = self.extract_coordinates_from_map_link(self.map_link)
             if coords:
                 self.latitude, self.longitude = coords
+        # Statistik rating diupdate lewat F(); save penuh tidak boleh menimpanya dengan nilai lama
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            skipped = set(rating_stats.STATS_FIELDS) | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped and field.name not in skipped
+            ]
         super().save(*args, **kwargs)
     
     @staticmethod
@@ -129,49 +198,90 @@ class Laundry(models.Model):
         return None
     
     def calculate_distance(self, user_lat, user_lon):
-        """Hitung jarak dari user (simplified - nanti bisa pakai haversine)"""
+        """Hitung jarak dari user (haversine, km)"""
         if self.latitude and self.longitude:
-            from math import radians, sin, cos, sqrt, atan2
-            R = 6371  # Radius bumi dalam km
-            
-            lat1, lon1 = radians(user_lat), radians(user_lon)
-            lat2, lon2 = radians(float(self.latitude)), radians(float(self.longitude))
-            
-            dlat = lat2 - lat1
-            dlon = lon2 - lon1
-            
-            a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-            c = 2 * atan2(sqrt(a), sqrt(1-a))
-            distance = R * c
-            
-            return round(distance, 2)
+            return round(geo.haversine_km(user_lat, user_lon, self.latitude, self.longitude), 2)
         return 0
     
     def update_rating(self):
-        """Update rating laundry berdasarkan reviews"""
-        from django.db.models import Avg, Count
-        
-        # Hitung average rating dari reviews yang approved
-        stats = self.reviews.filter(is_approved=True).aggregate(
-            avg_rating=Avg('rating'),
-            total=Count('id')
-        )
+        """Hitung ulang statistik rating laundry ini dari reviews yang approved.
         
-        if stats['total'] > 0:
-            self.rating = round(stats['avg_rating'], 1)
-            self.total_reviews = stats['total']
-        else:
-            # Jika belum ada review, set default 0
-            self.rating = 0.0
-            self.total_reviews = 0
-        
-        self.save(update_fields=['rating', 'total_reviews'])
+        Tidak dipanggil saat review disimpan (statistik sudah dijaga inkremental
+        oleh partners.rating_stats); dipakai untuk koreksi manual.
+        """
+        rating_stats.rebuild([self.pk])
+        self.refresh_from_db(fields=rating_stats.STATS_FIELDS)
     
     class Meta:
         db_table = 'laundries'
         verbose_name = 'Laundry'
         verbose_name_plural = 'Laundries'
         ordering = ['-rating', '-total_orders_completed']
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='laundry_lat_lon_idx'),
+            models.Index(fields=['city', '-rating', '-total_orders_completed', '-id'], name='laundry_listing_idx'),
+        ]
+
+class LaundryOpeningInterval(models.Model):
+    """Interval jam buka mingguan (menit sejak Senin 00:00 WIB), dikelola partners.schedule"""
+    laundry = models.ForeignKey(Laundry, on_delete=models.CASCADE, related_name='opening_intervals')
+    start_minute = models.PositiveIntegerField()
+    end_minute = models.PositiveIntegerField()
+    
+    def __str__(self):
+        return f"{self.laundry_id}: {self.start_minute}-{self.end_minute}"
+    
+    class Meta:
+        db_table = 'laundry_opening_intervals'
+        verbose_name = 'Laundry Opening Interval'
+        verbose_name_plural = 'Laundry Opening Intervals'
+        indexes = [
+            models.Index(fields=['start_minute', 'end_minute'], name='opening_interval_range_idx'),
+            models.Index(fields=['laundry', 'start_minute'], name='opening_interval_laundry_idx'),
+        ]
+
+class LaundrySearchToken(models.Model):
+    """Inverted index pencarian laundry (kata & trigram), dikelola partners.search"""
+    KIND_CHOICES = [
+        ('w', 'Kata'),
+        ('t', 'Trigram'),
+    ]
+    
+    laundry = models.ForeignKey(Laundry, on_delete=models.CASCADE, related_name='search_tokens')
+    kind = models.CharField(max_length=1, choices=KIND_CHOICES)
+    token = models.CharField(max_length=40)
+    weight = models.PositiveSmallIntegerField(default=1)
+    
+    def __str__(self):
+        return f"{self.token} ({self.get_kind_display()}) - {self.laundry_id}"
+    
+    class Meta:
+        db_table = 'laundry_search_tokens'
+        verbose_name = 'Laundry Search Token'
+        verbose_name_plural = 'Laundry Search Tokens'
+        indexes = [
+            models.Index(fields=['kind', 'token', 'laundry'], name='search_token_lookup_idx'),
+        ]
+
+class LaundryRanking(models.Model):
+    """Leaderboard laundry per kota (district kosong) dan per kecamatan, dikelola partners.ranking"""
+    laundry = models.ForeignKey(Laundry, on_delete=models.CASCADE, related_name='rankings')
+    city = models.CharField(max_length=100)
+    district = models.CharField(max_length=100, blank=True, default='')
+    rank = models.PositiveIntegerField()
+    score = models.FloatField()
+    
+    def __str__(self):
+        return f"#{self.rank} {self.city}/{self.district or '*'} - {self.laundry_id}"
+    
+    class Meta:
+        db_table = 'laundry_rankings'
+        verbose_name = 'Laundry Ranking'
+        verbose_name_plural = 'Laundry Rankings'
+        constraints = [
+            # Juga menjadi index untuk membaca top N berurutan
+            models.UniqueConstraint(fields=['city', 'district', 'rank'], name='laundry_ranking_position_uniq'),
+        ]
 
 class CODRate(models.Model):
     """Tarif COD berdasarkan jarak"""
@@ -186,13 +296,9 @@ class CODRate(models.Model):
     
     @classmethod
     def get_fee_for_distance(cls, distance_km):
-        """Get COD fee berdasarkan jarak"""
-        rate = cls.objects.filter(
-            min_distance_km__lte=distance_km,
-            max_distance_km__gte=distance_km,
-            is_active=True
-        ).first()
-        return float(rate.fee) if rate else 5000.0
+        """Get COD fee berdasarkan jarak (dari tabel tarif in-process)"""
+        from .cod_rates import fee_for_distance
+        return fee_for_distance(distance_km)
     
     class Meta:
         db_table = 'cod_rates'
@@ -203,7 +309,11 @@ class CODRate(models.Model):
 class LaundryImage(models.Model):
     """Gambar-gambar laundry (max 15)"""
     laundry = models.ForeignKey(Laundry, on_delete=models.CASCADE, related_name='images')
-    image = models.ImageField(upload_to='laundry_images/%Y/%m/', verbose_name='Gambar')
+    # Disimpan sekali per isi file (foto yang sama di-upload ulang tidak menambah file)
+    image = models.ImageField(upload_to='laundry_images/%Y/%m/', storage=content_addressed_storage,
+                              verbose_name='Gambar')
+    # Path thumbnail/WebP hasil core.images
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     caption = models.CharField(max_length=200, blank=True, null=True)
     order = models.IntegerField(default=0, verbose_name='Urutan')
     is_primary = models.BooleanField(default=False, verbose_name='Gambar Utama')
@@ -284,41 +394,21 @@ class Voucher(models.Model):
         # Cek usage per user
         from orders.models import Order
         user_usage = Order.objects.filter(
-            customer=user,
+            user=user,
             voucher=self
         ).count()
         
         return user_usage < self.max_usage_per_user
     
     def calculate_discount(self, order_amount, order_kg, shipping_fee):
-        """Hitung diskon berdasarkan tipe voucher"""
+        """Hitung diskon berdasarkan tipe voucher (Decimal, dibulatkan ke rupiah)"""
         if not self.is_valid():
-            return 0
-        
-        # Cek minimum order
-        if order_amount < float(self.min_order_amount):
-            return 0
-        if order_kg < float(self.min_order_kg):
-            return 0
-        
-        if self.voucher_type == 'free_shipping':
-            return float(shipping_fee)
+            return Decimal('0')
         
-        elif self.voucher_type == 'percentage_discount':
-            discount = order_amount * (float(self.discount_value) / 100)
-            if self.max_discount:
-                discount = min(discount, float(self.max_discount))
-            return discount
-        
-        elif self.voucher_type == 'fixed_discount':
-            return float(self.discount_value)
-        
-        elif self.voucher_type == 'free_kg':
-            # Gratis KG dihitung dari harga per kg laundry
-            price_per_kg = order_amount / order_kg if order_kg > 0 else 0
-            return price_per_kg * float(self.discount_value)
-        
-        return 0
+        from orders.pricing import voucher_discount, as_decimal, round_rupiah
+        order_amount, order_kg = as_decimal(order_amount), as_decimal(order_kg)
+        price_per_kg = order_amount / order_kg if order_kg > 0 else Decimal('0')
+        return round_rupiah(voucher_discount(self, price_per_kg, order_kg, order_amount, as_decimal(shipping_fee)))
     
     class Meta:
         db_table = 'vouchers'
@@ -426,6 +516,9 @@ class MitraVerification(models.Model):
     bank_account_proof = models.ImageField(upload_to='mitra_verifications/bank/', 
                                           verbose_name='Foto Buku Tabungan/Bukti Rekening')
     
+    # Path thumbnail/WebP hasil core.images
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
+    
     # Additional Information
     years_of_experience = models.IntegerField(verbose_name='Pengalaman (Tahun)', default=0)
     daily_capacity_kg = models.DecimalField(max_digits=6, decimal_places=1, 
@@ -0,0 +1,108 @@
+"""Leaderboard laundry terbaik per kota dan per kecamatan.
+
+Skor dihitung berkala (management command refresh_laundry_rankings) lalu
+disimpan berurutan di tabel laundry_rankings, sehingga "top N" cukup membaca N
+baris pertama index (city, district, rank) tanpa mengurutkan tabel laundries.
+
+Skor = rata-rata Bayesian + bonus order selesai:
+
+    bayes = (PRIOR_REVIEWS * rata2_kota + rating_sum) / (PRIOR_REVIEWS + total_reviews)
+    skor  = bayes + ORDERS_WEIGHT * log10(1 + total_orders_completed)
+
+Laundry dengan sedikit ulasan ditarik ke rata-rata kota, jadi satu ulasan
+bintang 5 tidak langsung menempatkan laundry baru di puncak.
+"""
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Exists, F, IntegerField, OuterRef, Value
+import math
+
+# Bobot prior: setara sekian ulasan bernilai rata-rata kota
+PRIOR_REVIEWS = 10
+
+# Bonus per kelipatan 10 order selesai
+ORDERS_WEIGHT = 0.25
+
+# Baris ranking untuk seluruh kota memakai district kosong
+CITY_WIDE = ''
+
+TOP_LIMIT = 10
+
+RANKING_FIELDS = ('id', 'city', 'district', 'rating_sum', 'total_reviews', 'total_orders_completed')
+
+
+def score(rating_sum, total_reviews, total_orders_completed, prior_mean):
+    bayes = (PRIOR_REVIEWS * prior_mean + rating_sum) / (PRIOR_REVIEWS + total_reviews)
+    return bayes + ORDERS_WEIGHT * math.log10(1 + total_orders_completed)
+
+
+def compute_rankings(laundries):
+    """List (city, district, rank, laundry_id, skor) dari dict laundry berisi RANKING_FIELDS"""
+    laundries = list(laundries)
+
+    # Rata-rata rating per kota sebagai prior; kota tanpa ulasan memakai rata-rata global
+    totals = defaultdict(lambda: [0, 0])
+    for laundry in laundries:
+        totals[laundry['city']][0] += laundry['rating_sum']
+        totals[laundry['city']][1] += laundry['total_reviews']
+    all_sum = sum(rating_sum for rating_sum, _ in totals.values())
+    all_reviews = sum(count for _, count in totals.values())
+    global_mean = all_sum / all_reviews if all_reviews else 0.0
+
+    areas = defaultdict(list)
+    for laundry in laundries:
+        city_sum, city_reviews = totals[laundry['city']]
+        prior_mean = city_sum / city_reviews if city_reviews else global_mean
+        entry = (
+            score(laundry['rating_sum'], laundry['total_reviews'], laundry['total_orders_completed'], prior_mean),
+            laundry['id'],
+        )
+        areas[(laundry['city'], CITY_WIDE)].append(entry)
+        if laundry['district']:
+            areas[(laundry['city'], laundry['district'])].append(entry)
+
+    rows = []
+    for (city, district), entries in areas.items():
+        # Skor menurun, id menaik sebagai tie-breaker yang stabil
+        entries.sort(key=lambda entry: (-entry[0], entry[1]))
+        rows.extend(
+            (city, district, rank, laundry_id, round(value, 4))
+            for rank, (value, laundry_id) in enumerate(entries, start=1)
+        )
+    return rows
+
+
+def refresh():
+    """Hitung ulang seluruh leaderboard laundry aktif. Mengembalikan jumlah baris ranking."""
+    from .models import Laundry, LaundryRanking
+
+    laundries = Laundry.objects.filter(is_active=True).values(*RANKING_FIELDS).order_by()
+    rows = [
+        LaundryRanking(city=city, district=district, rank=rank, laundry_id=laundry_id, score=value)
+        for city, district, rank, laundry_id, value in compute_rankings(laundries)
+    ]
+    with transaction.atomic():
+        LaundryRanking.objects.all().delete()
+        LaundryRanking.objects.bulk_create(rows, batch_size=1000)
+
+    from . import listing
+    listing.invalidate()
+    return len(rows)
+
+
+def ranked(queryset, city, district=CITY_WIDE):
+    """Laundry `queryset` yang masuk leaderboard, urut rank (dibaca lewat index (city, district, rank))"""
+    return queryset.filter(
+        rankings__city=city, rankings__district=district,
+    ).annotate(rank=F('rankings__rank')).order_by('rank')
+
+
+def unranked(queryset, city, district=CITY_WIDE):
+    """Laundry `queryset` yang belum masuk refresh terakhir (baru dibuat/diaktifkan), urut id"""
+    from .models import LaundryRanking
+
+    positions = LaundryRanking.objects.filter(laundry=OuterRef('pk'), city=city, district=district)
+    queryset = queryset.filter(city=city)
+    if district:
+        queryset = queryset.filter(district=district)
+    return queryset.exclude(Exists(positions)).annotate(rank=Value(None, IntegerField())).order_by('id')
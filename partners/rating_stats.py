@@ -0,0 +1,152 @@
+"""Statistik rating per laundry: histogram (rating_count_1..5), rating_sum,
+total_reviews dan rating rata-rata.
+
+Statistik dijaga secara inkremental dari signal Review: setiap simpan/hapus
+review hanya menjalankan UPDATE dengan F() pada laundry terkait, sehingga biaya
+submit review tidak bergantung pada jumlah review laundry tersebut. rebuild()
+menghitung ulang semuanya dengan satu GROUP BY untuk rekonsiliasi.
+
+Rata-rata selalu dihitung dengan average_rating() (Decimal, ROUND_HALF_UP),
+baik oleh apply_change() maupun rebuild(), jadi keduanya menghasilkan nilai
+yang sama untuk histogram yang sama.
+"""
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import transaction
+from django.db.models import Count, F
+
+STARS = range(1, 6)
+COUNT_FIELDS = {star: f'rating_count_{star}' for star in STARS}
+
+# Semua kolom Laundry yang dikelola modul ini (tidak ikut ditulis oleh save penuh)
+STATS_FIELDS = [*COUNT_FIELDS.values(), 'rating_sum', 'total_reviews', 'rating']
+
+
+def review_state(review):
+    """(laundry_id, rating) review yang ikut dihitung, atau None jika tidak dihitung"""
+    if review is None or not review['is_approved']:
+        return None
+    return review['laundry_id'], review['rating']
+
+
+def stored_review_state(review_pk):
+    """State review yang tersimpan di database (sebelum save), lewat lookup PK.
+
+    Row review dikunci sampai transaksi pemanggil selesai (Review.save membuka
+    transaksi), jadi dua save bersamaan tidak membaca state lama yang sama.
+    """
+    from orders.models import Review
+
+    if review_pk is None:
+        return None
+    return review_state(
+        Review.objects.select_for_update().filter(pk=review_pk).values('laundry_id', 'rating', 'is_approved').first()
+    )
+
+
+def apply_change(old_state, new_state):
+    """Terapkan perpindahan review dari old_state ke new_state ke histogram"""
+    from .models import Laundry
+
+    if old_state == new_state:
+        return
+    deltas = defaultdict(lambda: defaultdict(int))
+    if old_state is not None:
+        laundry_id, rating = old_state
+        deltas[laundry_id][rating] -= 1
+    if new_state is not None:
+        laundry_id, rating = new_state
+        deltas[laundry_id][rating] += 1
+
+    points = []
+    with transaction.atomic():
+        for laundry_id, stars in deltas.items():
+            changes = {COUNT_FIELDS[star]: F(COUNT_FIELDS[star]) + delta for star, delta in stars.items() if delta}
+            if not changes:
+                continue
+            laundries = Laundry.objects.filter(pk=laundry_id)
+            laundries.update(
+                rating_sum=F('rating_sum') + sum(star * delta for star, delta in stars.items()),
+                total_reviews=F('total_reviews') + sum(stars.values()),
+                **changes,
+            )
+            # Row sudah terkunci oleh UPDATE di atas; baca counter terbaru lalu
+            # hitung rata-rata dengan pembulatan yang sama seperti rebuild()
+            totals = laundries.select_for_update().values(
+                'rating_sum', 'total_reviews', 'latitude', 'longitude', 'is_active',
+            ).first()
+            if totals is not None:
+                laundries.update(rating=average_rating(totals['rating_sum'], totals['total_reviews']))
+                if totals['is_active']:
+                    points.append((totals['latitude'], totals['longitude']))
+
+    # update() tidak memicu signal Laundry: rating tampil di kartu listing, facet
+    # rating per kota dan best_rating tile cluster. Dibuang setelah commit agar
+    # worker lain tidak meng-cache ulang rating lama dengan version baru.
+    transaction.on_commit(lambda: _invalidate_rating_caches(points))
+
+
+def _invalidate_rating_caches(points=None):
+    from . import clusters, facets, listing
+
+    listing.invalidate()
+    facets.invalidate()
+    if points is None:
+        clusters.invalidate()
+    else:
+        clusters.invalidate_points(points)
+
+
+def histogram(laundry):
+    """List {'rating', 'count', 'percentage'} bintang 5 -> 1 dari kolom histogram"""
+    counts = {star: getattr(laundry, field) for star, field in COUNT_FIELDS.items()}
+    total = sum(counts.values())
+    if not total:
+        return []
+    return [
+        {'rating': star, 'count': counts[star], 'percentage': counts[star] / total * 100}
+        for star in reversed(STARS)
+    ]
+
+
+def average_rating(rating_sum, total):
+    if not total:
+        return Decimal('0.0')
+    return (Decimal(rating_sum) / total).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP)
+
+
+def rebuild(laundry_ids=None):
+    """Hitung ulang statistik rating (semua laundry, atau laundry_ids) dengan satu GROUP BY.
+
+    Mengembalikan jumlah laundry yang punya review approved.
+    """
+    from orders.models import Review
+    from .models import Laundry
+
+    counts = defaultdict(dict)
+    rows = Review.objects.filter(is_approved=True)
+    if laundry_ids is not None:
+        rows = rows.filter(laundry_id__in=laundry_ids)
+    rows = rows.values('laundry_id', 'rating').annotate(total=Count('id')).order_by()
+    for row in rows:
+        counts[row['laundry_id']][row['rating']] = row['total']
+
+    laundries = []
+    for laundry_id, stars in counts.items():
+        laundry = Laundry(pk=laundry_id)
+        for star, field in COUNT_FIELDS.items():
+            setattr(laundry, field, stars.get(star, 0))
+        laundry.rating_sum = sum(star * total for star, total in stars.items())
+        laundry.total_reviews = sum(stars.values())
+        laundry.rating = average_rating(laundry.rating_sum, laundry.total_reviews)
+        laundries.append(laundry)
+
+    targets = Laundry.objects.all()
+    if laundry_ids is not None:
+        targets = targets.filter(pk__in=laundry_ids)
+    with transaction.atomic():
+        targets.update(rating=0, **{field: 0 for field in STATS_FIELDS if field != 'rating'})
+        Laundry.objects.bulk_update(laundries, STATS_FIELDS, batch_size=500)
+
+    transaction.on_commit(_invalidate_rating_caches)
+    return len(laundries)
@@ -0,0 +1,93 @@
+"""Feed ulasan laundry dengan keyset (cursor) pagination.
+
+Urutan 'newest' memakai (created_at, id) menurun dan 'rating' memakai
+(rating, created_at, id) menurun; keduanya didukung index komposit di tabel
+reviews yang diawali (laundry, is_approved), jadi halaman ke-N cukup membaca
+page_size + 1 baris dari posisi cursor.
+"""
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from core import images as image_derivatives
+from .listing import encode_cursor, decode_cursor
+
+REVIEW_PAGE_SIZE = 20
+REVIEW_MAX_PAGE_SIZE = 50
+
+SORTS = ('newest', 'rating')
+
+
+def approved_reviews(laundry, params=None):
+    """Review approved milik laundry dengan filter opsional photos=1 / featured=1"""
+    from orders.models import Review
+
+    reviews = Review.objects.filter(laundry=laundry, is_approved=True).select_related('user')
+    params = params or {}
+    if params.get('photos') in ('1', 'true'):
+        has_photo = Q()
+        for field in ('photo1', 'photo2', 'photo3'):
+            has_photo |= Q(**{f'{field}__gt': ''})
+        reviews = reviews.filter(has_photo)
+    if params.get('featured') in ('1', 'true'):
+        reviews = reviews.filter(is_featured=True)
+    return reviews
+
+
+def paginate_reviews(queryset, cursor=None, page_size=REVIEW_PAGE_SIZE, sort='newest'):
+    """Ambil satu halaman review setelah `cursor`. Mengembalikan (list review, next_cursor atau None)."""
+    if sort not in SORTS:
+        raise ValueError(f'Urutan tidak dikenal: {sort}')
+
+    if sort == 'rating':
+        queryset = queryset.order_by('-rating', '-created_at', '-id')
+        key = lambda review: (review.rating, review.created_at.isoformat(), review.id)
+    else:
+        queryset = queryset.order_by('-created_at', '-id')
+        key = lambda review: (review.created_at.isoformat(), review.id)
+
+    if cursor:
+        try:
+            values = decode_cursor(cursor)
+            if sort == 'rating':
+                rating, created_at, last_id = values
+                rating = int(rating)
+            else:
+                created_at, last_id = values
+            created_at, last_id = parse_datetime(created_at), int(last_id)
+        except (TypeError, ValueError):
+            raise ValueError('Cursor tidak valid')
+        if created_at is None:
+            raise ValueError('Cursor tidak valid')
+
+        after = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=last_id)
+        if sort == 'rating':
+            after = Q(rating__lt=rating) | (Q(rating=rating) & after)
+        queryset = queryset.filter(after)
+
+    rows = list(queryset[:page_size + 1])
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(key(rows[-1]))
+    return rows, None
+
+
+def parse_page_size(value):
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        return REVIEW_PAGE_SIZE
+    return max(1, min(page_size, REVIEW_MAX_PAGE_SIZE))
+
+
+def serialize_review(review):
+    return {
+        'id': review.id,
+        'user': review.user.get_full_name() or review.user.username,
+        'rating': review.rating,
+        'comment': review.comment,
+        'is_featured': review.is_featured,
+        'photos': [
+            image_derivatives.url_for(review, field)
+            for field in ('photo1', 'photo2', 'photo3') if getattr(review, field)
+        ],
+        'created_at': review.created_at.isoformat(),
+    }
@@ -0,0 +1,145 @@
+"""Index jadwal operasional laundry.
+
+Jam buka setiap laundry disimpan sebagai interval mingguan dalam "menit sejak
+Senin 00:00" (zona waktu Asia/Jakarta) di tabel laundry_opening_intervals.
+Pertanyaan "laundry mana yang buka pada waktu T" menjadi range query
+start_minute <= t < end_minute. Jadwal yang melewati tengah malam (mis. 20:00 -
+02:00) atau akhir minggu dipecah menjadi dua interval.
+
+sweep() dijalankan berkala (management command sweep_open_status) untuk
+menyinkronkan Laundry.is_open_now dan status dengan index ini, sehingga query
+listing cukup memfilter kolom boolean.
+"""
+from django.db import transaction
+from core.cache_versions import bump_version
+from django.db.models import Case, Exists, F, Min, OuterRef, Q, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_time
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+SCHEDULE_TIMEZONE = ZoneInfo('Asia/Jakarta')
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# Field Laundry yang mempengaruhi index
+SCHEDULE_FIELDS = {'operating_hours_start', 'operating_hours_end'}
+
+# Naik setiap sweep() mengubah status buka/tutup (dipakai ETag halaman laundry)
+VERSION_KEY = 'laundry_schedule:version'
+
+
+def _minutes(value):
+    """TimeField bisa masih berupa string 'HH:MM' sebelum di-reload dari database"""
+    if isinstance(value, str):
+        value = parse_time(value)
+    return value.hour * 60 + value.minute
+
+
+def week_minute(when=None):
+    """Menit sejak Senin 00:00 WIB untuk datetime `when` (default: sekarang)"""
+    when = timezone.localtime(when or timezone.now(), SCHEDULE_TIMEZONE)
+    return when.weekday() * MINUTES_PER_DAY + when.hour * 60 + when.minute
+
+
+def weekly_intervals(opens, closes):
+    """List (start_minute, end_minute) mingguan untuk jam buka harian opens-closes.
+
+    Jam buka == jam tutup dianggap buka 24 jam.
+    """
+    start, end = _minutes(opens), _minutes(closes)
+    if start == end:
+        return [(0, MINUTES_PER_WEEK)]
+
+    length = (end - start) % MINUTES_PER_DAY
+    intervals = []
+    for day in range(7):
+        day_start = day * MINUTES_PER_DAY + start
+        day_end = day_start + length
+        if day_end <= MINUTES_PER_WEEK:
+            intervals.append((day_start, day_end))
+        else:
+            # Minggu malam yang berlanjut ke Senin pagi
+            intervals.append((day_start, MINUTES_PER_WEEK))
+            intervals.append((0, day_end - MINUTES_PER_WEEK))
+    return sorted(intervals)
+
+
+def index_laundry(laundry):
+    """Tulis ulang interval jadwal milik satu laundry"""
+    from .models import LaundryOpeningInterval
+
+    rows = [
+        LaundryOpeningInterval(laundry_id=laundry.pk, start_minute=start, end_minute=end)
+        for start, end in weekly_intervals(laundry.operating_hours_start, laundry.operating_hours_end)
+    ]
+    with transaction.atomic():
+        LaundryOpeningInterval.objects.filter(laundry_id=laundry.pk).delete()
+        LaundryOpeningInterval.objects.bulk_create(rows)
+
+
+def open_at_q(when=None):
+    """Q filter Laundry yang buka pada `when` menurut index jadwal"""
+    from .models import LaundryOpeningInterval
+
+    minute = week_minute(when)
+    return Q(Exists(LaundryOpeningInterval.objects.filter(
+        laundry=OuterRef('pk'),
+        start_minute__lte=minute,
+        end_minute__gt=minute,
+    )))
+
+
+def next_boundary(when=None):
+    """Datetime jam buka/tutup terdekat setelah `when` (None jika index kosong)"""
+    from .models import LaundryOpeningInterval
+
+    when = when or timezone.now()
+    minute = week_minute(when)
+    intervals = LaundryOpeningInterval.objects.exclude(start_minute=0, end_minute=MINUTES_PER_WEEK)
+    after = intervals.aggregate(
+        start=Min('start_minute', filter=Q(start_minute__gt=minute)),
+        end=Min('end_minute', filter=Q(end_minute__gt=minute)),
+        first=Min('start_minute'),
+    )
+    candidates = [value for value in (after['start'], after['end']) if value is not None]
+    if candidates:
+        delta = min(candidates) - minute
+    elif after['first'] is not None:
+        # Tidak ada batas lagi minggu ini, ambil yang pertama minggu depan
+        delta = MINUTES_PER_WEEK - minute + after['first']
+    else:
+        return None
+
+    local = timezone.localtime(when, SCHEDULE_TIMEZONE).replace(second=0, microsecond=0)
+    return local + timedelta(minutes=delta)
+
+
+def sweep(when=None):
+    """Sinkronkan is_open_now & status semua laundry dengan jadwal pada `when`.
+
+    Hanya laundry yang is_open_now-nya berbeda dari jadwal yang di-UPDATE.
+    Status 'tutup' menjadi 'buka' saat jam buka dan sebaliknya saat jam tutup;
+    status manual 'full' dan 'istirahat' tidak disentuh.
+
+    Mengembalikan (jumlah dibuka, jumlah ditutup).
+    """
+    from .models import Laundry
+
+    is_open = open_at_q(when)
+    with transaction.atomic():
+        opened = Laundry.objects.filter(is_open, is_open_now=False).update(
+            is_open_now=True,
+            status=Case(When(status='tutup', then=Value('buka')), default=F('status')),
+        )
+        closed = Laundry.objects.filter(~is_open, is_open_now=True).update(
+            is_open_now=False,
+            status=Case(When(status='buka', then=Value('tutup')), default=F('status')),
+        )
+
+    if opened or closed:
+        # update() tidak memicu signal; jumlah facet status ikut dibuang manual
+        from . import facets
+        facets.invalidate()
+        bump_version(VERSION_KEY)
+    return opened, closed
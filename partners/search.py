@@ -0,0 +1,183 @@
+"""Pencarian laundry berbasis inverted index (tabel laundry_search_tokens).
+
+Setiap laundry disimpan sebagai token kata (bobot per field: nama > kecamatan/kota
+> alamat) dan trigram. Pencarian pertama mencocokkan kata (dengan prefix untuk
+kata terakhir yang sedang diketik); jika hasilnya kurang, trigram dipakai sebagai
+fallback yang toleran typo. Skor akhir menggabungkan relevansi dan rating.
+
+Fallback trigram dua tahap: index trigram memilih laundry yang cukup banyak
+berbagi trigram dengan kata pencarian, lalu kata-kata laundry tersebut (hanya
+yang panjangnya mungkin mencapai MIN_TRIGRAM_SIMILARITY) dibandingkan per kata
+dengan kemiripan Jaccard |A ∩ B| / |A ∪ B|.
+"""
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Length
+import math
+import re
+import unicodedata
+
+# Bobot token per field
+FIELD_WEIGHTS = {
+    'name': 3,
+    'district': 2,
+    'city': 2,
+    'address': 1,
+}
+MAX_WEIGHT = max(FIELD_WEIGHTS.values())
+INDEXED_FIELDS = set(FIELD_WEIGHTS)
+
+# Kata yang muncul di hampir semua listing tidak membantu relevansi
+STOPWORDS = {'laundry', 'jl', 'jln', 'jalan', 'no', 'rt', 'rw', 'kec', 'kab', 'kota', 'gg', 'dan', 'di'}
+
+KIND_WORD = 'w'
+KIND_TRIGRAM = 't'
+TOKEN_MAX_LENGTH = 40
+
+# Kemiripan trigram (Jaccard, rata-rata per kata pencarian) minimum agar hasil fallback dianggap cocok
+MIN_TRIGRAM_SIMILARITY = 0.3
+
+# Porsi rating dalam skor akhir (sisanya relevansi teks)
+RATING_WEIGHT = 0.2
+
+# Jumlah kandidat teratas per tahap yang diranking ulang dengan rating
+MIN_CANDIDATES = 100
+
+_word_re = re.compile(r'[a-z0-9]+')
+
+
+def normalize(text):
+    """Lowercase dan buang aksen"""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def words(text):
+    return [w for w in _word_re.findall(normalize(text)) if len(w) > 1 and w not in STOPWORDS]
+
+
+def trigrams(word):
+    padded = f' {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def tokens_for_laundry(laundry):
+    """{(kind, token): weight} untuk satu laundry"""
+    tokens = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for word in words(getattr(laundry, field)):
+            key = (KIND_WORD, word[:TOKEN_MAX_LENGTH])
+            tokens[key] = max(tokens.get(key, 0), weight)
+            for trigram in trigrams(word):
+                tokens.setdefault((KIND_TRIGRAM, trigram), 1)
+    return tokens
+
+
+def index_laundry(laundry):
+    """Tulis ulang token milik satu laundry"""
+    from .models import LaundrySearchToken
+
+    rows = [
+        LaundrySearchToken(laundry_id=laundry.pk, kind=kind, token=token, weight=weight)
+        for (kind, token), weight in tokens_for_laundry(laundry).items()
+    ]
+    with transaction.atomic():
+        LaundrySearchToken.objects.filter(laundry_id=laundry.pk).delete()
+        LaundrySearchToken.objects.bulk_create(rows, batch_size=1000)
+
+
+def _word_matches(terms, base_filter, candidates):
+    from .models import LaundrySearchToken
+
+    # Kata terakhir dicocokkan sebagai prefix (user masih mengetik)
+    condition = Q(token__in=terms[:-1]) | Q(token__startswith=terms[-1])
+    rows = (
+        LaundrySearchToken.objects
+        .filter(base_filter, condition, kind=KIND_WORD)
+        .values('laundry_id')
+        .annotate(score=Sum('weight'))
+        .order_by('-score')[:candidates]
+    )
+    max_score = MAX_WEIGHT * len(terms)
+    return {row['laundry_id']: min(row['score'] / max_score, 1.0) for row in rows}
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def _trigram_matches(terms, base_filter, candidates):
+    from .models import LaundrySearchToken
+
+    term_trigrams = {term: trigrams(term) for term in terms}
+    query_trigrams = set().union(*term_trigrams.values())
+    # Kata dengan Jaccard >= ambang terhadap kata pencarian terpendek berbagi minimal sekian trigram
+    min_matches = math.ceil(MIN_TRIGRAM_SIMILARITY * min(len(t) for t in term_trigrams.values()))
+    rows = (
+        LaundrySearchToken.objects
+        .filter(base_filter, kind=KIND_TRIGRAM, token__in=query_trigrams)
+        .values('laundry_id')
+        .annotate(matches=Count('id'))
+        .filter(matches__gte=min_matches)
+        .order_by('-matches')[:candidates]
+    )
+    laundry_ids = [row['laundry_id'] for row in rows]
+    if not laundry_ids:
+        return {}
+
+    # Kata dengan n trigram hanya bisa mencapai Jaccard t terhadap kata dengan t*n .. n/t trigram
+    lengths = [len(term) for term in terms]
+    words_by_laundry = {}
+    word_rows = (
+        LaundrySearchToken.objects
+        .filter(kind=KIND_WORD, laundry_id__in=laundry_ids)
+        .annotate(length=Length('token'))
+        .filter(
+            length__gte=math.floor(min(lengths) * MIN_TRIGRAM_SIMILARITY),
+            length__lte=math.ceil(max(lengths) / MIN_TRIGRAM_SIMILARITY),
+        )
+        .values_list('laundry_id', 'token')
+    )
+    for laundry_id, token in word_rows:
+        words_by_laundry.setdefault(laundry_id, []).append(trigrams(token))
+
+    results = {}
+    for laundry_id, word_trigrams in words_by_laundry.items():
+        similarity = sum(
+            max(jaccard(query, word) for word in word_trigrams) for query in term_trigrams.values()
+        ) / len(term_trigrams)
+        if similarity >= MIN_TRIGRAM_SIMILARITY:
+            results[laundry_id] = similarity
+    return results
+
+
+def search_laundries(query, limit=20, city=None):
+    """Cari laundry aktif; mengembalikan list laundry dengan atribut `search_score`"""
+    from .models import Laundry
+
+    terms = words(query)
+    if not terms:
+        return []
+
+    base_filter = Q(laundry__is_active=True)
+    if city:
+        base_filter &= Q(laundry__city=city)
+
+    candidates = max(limit * 5, MIN_CANDIDATES)
+    relevance = _word_matches(terms, base_filter, candidates)
+    if len(relevance) < limit:
+        # Fallback toleran typo, skornya sedikit diturunkan agar kecocokan kata tetap di atas
+        for laundry_id, similarity in _trigram_matches(terms, base_filter, candidates).items():
+            if laundry_id not in relevance:
+                relevance[laundry_id] = similarity * 0.8
+
+    if not relevance:
+        return []
+
+    laundries = list(Laundry.objects.filter(id__in=relevance.keys()).prefetch_related('images'))
+    for laundry in laundries:
+        laundry.search_score = round(
+            (1 - RATING_WEIGHT) * relevance[laundry.id] + RATING_WEIGHT * float(laundry.rating) / 5, 4
+        )
+    laundries.sort(key=lambda laundry: (-laundry.search_score, laundry.id))
+    return laundries[:limit]
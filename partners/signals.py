@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from core.images import derivatives_ready
+from .models import CODRate, Laundry, LaundryImage, MitraProfile, Voucher
+from . import cod_rates, clusters, search, facets, schedule, detail_cache, voucher_cache, listing
+
+
+@receiver([post_save, post_delete], sender=CODRate)
+def invalidate_cod_rates(sender, **kwargs):
+    """Reload tabel tarif COD di semua worker setelah admin mengubah tarif.
+
+    Version dinaikkan setelah commit; jika sebelumnya, worker yang reload di
+    antaranya menyimpan tarif lama dengan version baru sampai edit berikutnya.
+    """
+    transaction.on_commit(cod_rates.invalidate)
+
+
+@receiver(pre_save, sender=Laundry)
+def remember_cluster_state(sender, instance, update_fields=None, **kwargs):
+    """Simpan posisi & isi marker laundry di database sebelum disimpan"""
+    instance._stored_cluster_state = None
+    if update_fields is not None and not set(update_fields) & set(clusters.CLUSTER_FIELDS):
+        # Field cluster tidak ikut disimpan; state dianggap tidak berubah
+        instance._stored_cluster_state = clusters.cluster_state(instance)
+    elif instance.pk is not None:
+        instance._stored_cluster_state = clusters.cluster_state(
+            Laundry.objects.filter(pk=instance.pk).values(*clusters.CLUSTER_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=Laundry)
+def invalidate_laundry_clusters(sender, instance, **kwargs):
+    """Hanya tile yang memuat posisi lama/baru laundry yang usang, dan hanya jika isi marker berubah"""
+    clusters.invalidate_change(getattr(instance, '_stored_cluster_state', None), clusters.cluster_state(instance))
+
+
+@receiver(post_delete, sender=Laundry)
+def remove_laundry_from_clusters(sender, instance, **kwargs):
+    clusters.invalidate_change(clusters.cluster_state(instance), None)
+
+
+@receiver([post_save, post_delete], sender=Laundry)
+def invalidate_laundry_facets(sender, **kwargs):
+    """Ringkasan facet per kota yang ter-cache usang setelah data laundry berubah"""
+    facets.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Laundry)
+@receiver([post_save, post_delete], sender=LaundryImage)
+@receiver(derivatives_ready, sender=LaundryImage)
+def invalidate_laundry_listing(sender, **kwargs):
+    """Kartu laundry di listing berubah: ETag listing API usang"""
+    listing.invalidate()
+
+
+@receiver(post_save, sender=Laundry)
+def update_laundry_search_index(sender, instance, update_fields=None, **kwargs):
+    """Perbarui token pencarian jika field yang diindeks ikut berubah"""
+    if update_fields is not None and not search.INDEXED_FIELDS.intersection(update_fields):
+        return
+    search.index_laundry(instance)
+
+
+@receiver(post_save, sender=Laundry)
+def update_laundry_schedule_index(sender, instance, update_fields=None, **kwargs):
+    """Perbarui interval jam buka jika jam operasional ikut berubah"""
+    if update_fields is not None and not schedule.SCHEDULE_FIELDS.intersection(update_fields):
+        return
+    schedule.index_laundry(instance)
+
+
+@receiver([post_save, post_delete], sender=Laundry)
+def invalidate_laundry_detail(sender, instance, **kwargs):
+    detail_cache.invalidate(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=LaundryImage)
+@receiver(derivatives_ready, sender=LaundryImage)
+@receiver([post_save, post_delete], sender=Voucher)
+def invalidate_laundry_detail_related(sender, instance, **kwargs):
+    """Foto atau voucher laundry berubah: fragment detail laundry tersebut usang"""
+    detail_cache.invalidate(instance.laundry_id)
+
+
+@receiver([post_save, post_delete], sender=Voucher)
+def invalidate_laundry_vouchers(sender, instance, **kwargs):
+    """Daftar voucher aktif laundry yang ter-cache usang setelah voucher berubah"""
+    voucher_cache.invalidate(instance.laundry_id)
+
+
+@receiver(post_save, sender=MitraProfile)
+def invalidate_mitra_laundry_details(sender, instance, **kwargs):
+    """Deskripsi mitra ikut tampil di galeri semua laundry miliknya"""
+    for laundry_id in instance.laundries.values_list('id', flat=True):
+        detail_cache.invalidate(laundry_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_reviewer_laundry_details(sender, instance, update_fields=None, **kwargs):
+    """Nama & foto reviewer ikut tampil di fragment ulasan semua laundry yang pernah diulasnya"""
+    if update_fields is not None and not set(update_fields) & detail_cache.REVIEWER_FIELDS:
+        # Misalnya update last_login saat login
+        return
+    laundry_ids = instance.reviews.filter(is_approved=True).values_list('laundry_id', flat=True).distinct()
+    for laundry_id in laundry_ids:
+        detail_cache.invalidate(laundry_id)
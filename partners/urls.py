@@ -20,6 +20,12 @@ urlpatterns = [
     path('admin/vouchers/<int:request_id>/approve/', views.approve_voucher_request, name='approve_voucher_request'),
     path('admin/vouchers/<int:request_id>/reject/', views.reject_voucher_request, name='reject_voucher_request'),
     
+    # Laundry Listing API (cursor pagination)
+    path('api/laundries/', views.laundry_list_api, name='laundry_list_api'),
+    path('api/laundries/clusters/', views.laundry_clusters, name='laundry_clusters'),
+    path('api/laundries/search/', views.laundry_search, name='laundry_search'),
+    path('api/laundries/<int:laundry_id>/reviews/', views.laundry_reviews_api, name='laundry_reviews_api'),
+    
     # Laundry Detail & Images
     path('laundry/<int:laundry_id>/', views.laundry_detail, name='laundry_detail'),
     path('laundry/<int:laundry_id>/images/', views.upload_laundry_images, name='upload_laundry_images'),
@@ -4,9 +4,15 @@ from django.contrib import messages
 from django.core.mail import send_mail
 from django.conf import settings
 from django.http import JsonResponse
+from django.views.decorators.http import condition
 from django.utils import timezone
 from datetime import timedelta
 from .models import MitraRequest, Laundry, Voucher, VoucherRequest, LaundryImage, MitraVerification, MitraTransaction
+from core.cache_versions import get_versions
+from core.conditional import page_etag
+from core.uploadhandlers import rejected_uploads
+from . import geo, listing, clusters, search, facets, schedule, detail_cache, review_feed, voucher_cache
+from django.template.loader import render_to_string
 from django.db.models import Sum, Count, Q
 import uuid
 
@@ -411,58 +417,29 @@ def reject_voucher_request(request, request_id):
     
     return JsonResponse({'success': False, 'error': 'Method not allowed'})
 
+def _laundry_detail_etag(request, laundry_id):
+    """Data laundry, foto, ulasan & mitra (version detail), status buka (version jadwal), voucher aktif"""
+    detail_version, schedule_version = get_versions(detail_cache.version_key(laundry_id), schedule.VERSION_KEY)
+    vouchers = [voucher.pk for voucher in voucher_cache.active_vouchers(laundry_id)]
+    return page_etag(request, 'laundry_detail', laundry_id, detail_version, schedule_version, vouchers)
+
 @login_required
+@condition(etag_func=_laundry_detail_etag)
 def laundry_detail(request, laundry_id):
     """Preview page laundry dengan pricelist, map, vouchers, reviews"""
-    from orders.models import Review
-    from django.db.models import Avg, Count
-    
-    laundry = get_object_or_404(Laundry, id=laundry_id, is_active=True)
+    # Calculate distance from user location (if provided in session) in the same query
+    laundries = Laundry.objects.filter(is_active=True)
+    user_location = geo.user_location_from_session(request.session)
+    if user_location:
+        laundries = laundries.with_distance(*user_location)
+    laundry = get_object_or_404(laundries, id=laundry_id)
+    distance = getattr(laundry, 'distance', None)
     
-    # Calculate distance from user location (if provided in session)
-    distance = None
-    user_lat = request.session.get('user_latitude')
-    user_lon = request.session.get('user_longitude')
+    # Voucher aktif dari cache per laundry (TTL sampai batas periode terdekat)
+    active_vouchers = voucher_cache.active_vouchers(laundry)
     
-    if user_lat and user_lon and laundry.latitude and laundry.longitude:
-        try:
-            distance = laundry.calculate_distance(float(user_lat), float(user_lon))
-        except (ValueError, TypeError):
-            distance = None
-    
-    # Get active vouchers
-    active_vouchers = laundry.vouchers.filter(
-        is_active=True,
-        is_approved=True,
-        valid_from__lte=timezone.now(),
-        valid_until__gte=timezone.now()
-    )
-    
-    # Get images
-    images = laundry.images.all()[:15]
-    
-    # Get approved reviews (don't slice yet - we need to filter for rating breakdown)
-    all_reviews = Review.objects.filter(
-        laundry=laundry,
-        is_approved=True
-    ).select_related('user', 'order').order_by('-created_at')
-    
-    # Calculate rating breakdown using the full queryset
-    rating_breakdown = []
-    total_reviews = all_reviews.count()
-    
-    if total_reviews > 0:
-        for star in range(5, 0, -1):
-            count = all_reviews.filter(rating=star).count()
-            percentage = (count / total_reviews * 100) if total_reviews > 0 else 0
-            rating_breakdown.append({
-                'rating': star,
-                'count': count,
-                'percentage': percentage
-            })
-    
-    # Now slice the reviews for display (limit to 20)
-    reviews = all_reviews[:20]
+    # Galeri & ulasan dari fragment cache (version per laundry)
+    fragments = detail_cache.fragments_for(laundry)
     
     # Calculate estimated delivery in hours
     estimated_delivery_hours = round(laundry.estimated_delivery_time / 60, 1) if laundry.estimated_delivery_time else 0
@@ -471,14 +448,134 @@ def laundry_detail(request, laundry_id):
         'laundry': laundry,
         'distance': distance,
         'vouchers': active_vouchers,
-        'images': images,
-        'reviews': reviews,
-        'rating_breakdown': rating_breakdown,
-        'total_reviews': total_reviews,
+        'fragments': fragments,
         'estimated_delivery_hours': estimated_delivery_hours,
     }
     return render(request, 'partners/laundry_detail.html', context)
 
+@login_required
+def laundry_reviews_api(request, laundry_id):
+    """Feed ulasan laundry dengan cursor pagination (sort=newest|rating, photos=1, featured=1)"""
+    laundry = get_object_or_404(Laundry, id=laundry_id, is_active=True)
+    
+    try:
+        reviews, next_cursor = review_feed.paginate_reviews(
+            review_feed.approved_reviews(laundry, request.GET),
+            cursor=request.GET.get('cursor'),
+            page_size=review_feed.parse_page_size(request.GET.get('limit')),
+            sort=request.GET.get('sort', 'newest'),
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    html = render_to_string('components/review_card_list.html', {'reviews': reviews})
+    
+    return JsonResponse({
+        'success': True,
+        'results': [review_feed.serialize_review(review) for review in reviews],
+        'next_cursor': next_cursor,
+        'html': html,
+    })
+
+def _laundry_list_etag(request):
+    """Query string + lokasi user, dengan version listing & jadwal (tanpa query database)"""
+    listing_version, schedule_version = get_versions(listing.VERSION_KEY, schedule.VERSION_KEY)
+    return page_etag(
+        request, 'laundry_list', sorted(request.GET.lists()), listing.user_location_from_request(request),
+        listing_version, schedule_version,
+    )
+
+@login_required
+@condition(etag_func=_laundry_list_etag)
+def laundry_list_api(request):
+    """JSON listing laundry dengan cursor pagination (dipakai dashboard untuk load bertahap)"""
+    user_location = listing.user_location_from_request(request)
+    sort = request.GET.get('sort', 'rating')
+    city = request.GET.get('city', listing.DEFAULT_CITY)
+    cursor = request.GET.get('cursor')
+    
+    laundries = Laundry.objects.filter(
+        is_active=True,
+        city=city
+    ).prefetch_related('images')
+    
+    try:
+        # Jumlah per facet hanya dikirim di halaman pertama (satu query, atau cache jika tanpa filter)
+        facet_counts = None
+        if not cursor:
+            if listing.has_filters(request.GET):
+                facet_counts = listing.facet_counts(laundries, request.GET, user_location)
+            else:
+                facet_counts = facets.city_facets(city)
+        laundries = listing.filter_laundries(laundries, request.GET, user_location)
+        page, next_cursor = listing.paginate_laundries(
+            laundries,
+            cursor=cursor,
+            page_size=listing.parse_page_size(request.GET.get('limit')),
+            sort=sort,
+            user_location=user_location,
+            city=city,
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    html = render_to_string('components/laundry_card_list.html', {'laundries': page}, request=request)
+    
+    return JsonResponse({
+        'success': True,
+        'results': [listing.serialize_laundry(laundry) for laundry in page],
+        'next_cursor': next_cursor,
+        'facets': facet_counts,
+        'html': html,
+    })
+
+@login_required
+def laundry_search(request):
+    """Pencarian laundry (q=...) lewat inverted index, diurutkan relevansi + rating"""
+    query = request.GET.get('q', '').strip()
+    if len(query) > 100:
+        return JsonResponse({'success': False, 'error': 'Kata kunci terlalu panjang'}, status=400)
+    
+    results = search.search_laundries(
+        query,
+        limit=listing.parse_page_size(request.GET.get('limit')),
+        city=request.GET.get('city', listing.DEFAULT_CITY),
+    )
+    html = render_to_string('components/laundry_card_list.html', {'laundries': results}, request=request)
+    
+    return JsonResponse({
+        'success': True,
+        'results': [
+            dict(listing.serialize_laundry(laundry), score=laundry.search_score)
+            for laundry in results
+        ],
+        'html': html,
+    })
+
+@login_required
+def laundry_clusters(request):
+    """Cluster marker laundry untuk viewport peta (bbox=min_lat,min_lon,max_lat,max_lon&zoom=z)"""
+    try:
+        min_lat, min_lon, max_lat, max_lon = [float(v) for v in request.GET.get('bbox', '').split(',')]
+        zoom = int(request.GET.get('zoom'))
+    except (TypeError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Parameter bbox/zoom tidak valid'}, status=400)
+    
+    zoom = max(clusters.MIN_ZOOM, min(zoom, clusters.MAX_ZOOM))
+    try:
+        min_lat, min_lon, max_lat, max_lon = clusters.clamp_bbox(min_lat, min_lon, max_lat, max_lon)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    if min_lat > max_lat or min_lon > max_lon:
+        return JsonResponse({'success': False, 'error': 'Parameter bbox tidak valid'}, status=400)
+    
+    try:
+        results = clusters.clusters_for_bbox(min_lat, min_lon, max_lat, max_lon, zoom)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    return JsonResponse({'success': True, 'zoom': zoom, 'clusters': results})
+
 @login_required
 def upload_laundry_images(request, laundry_id):
     """Mitra upload images untuk laundry (max 15)"""
@@ -495,6 +592,10 @@ def upload_laundry_images(request, laundry_id):
     if request.method == 'POST':
         files = request.FILES.getlist('images')
         
+        # File terlalu besar / bukan gambar (magic bytes) sudah di-skip ImageUploadHandler
+        for message in rejected_uploads(request, 'images'):
+            messages.warning(request, message)
+        
         # Check current image count
         current_count = laundry.images.count()
         remaining_slots = 15 - current_count
@@ -505,20 +606,8 @@ def upload_laundry_images(request, laundry_id):
         
         uploaded = 0
         for idx, file in enumerate(files):
-            # Validate file size (max 5MB)
-            if file.size > 5 * 1024 * 1024:
-                messages.warning(request, f'{file.name} terlalu besar (max 5MB)')
-                continue
-            
-            # Validate file type - check MIME type AND extension
-            allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/webp']
-            allowed_extensions = ['.jpg', '.jpeg', '.png', '.webp']
-            
-            if file.content_type not in allowed_types:
-                messages.warning(request, f'{file.name} format tidak didukung. Gunakan JPG, PNG, atau WEBP')
-                continue
-            
             # Double-check extension
+            allowed_extensions = ['.jpg', '.jpeg', '.png', '.webp']
             import os
             file_extension = os.path.splitext(file.name)[1].lower()
             if file_extension not in allowed_extensions:
@@ -625,6 +714,12 @@ def submit_mitra_verification(request):
         pass
     
     if request.method == 'POST':
+        # Dokumen yang terlalu besar / bukan gambar sudah ditolak ImageUploadHandler
+        rejected = rejected_uploads(request)
+        if rejected:
+            messages.error(request, rejected[0])
+            return redirect('partners:submit_mitra_verification')
+        
         # Personal Identity
         full_name = request.POST.get('full_name')
         ktp_number = request.POST.get('ktp_number')
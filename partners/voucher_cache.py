@@ -0,0 +1,62 @@
+"""Cache voucher aktif per laundry.
+
+Daftar voucher aktif (is_active, is_approved, valid_from <= sekarang <=
+valid_until) sebuah laundry disimpan di cache bersama dengan TTL sampai batas
+periode terdekat: valid_until voucher yang sedang aktif atau valid_from voucher
+yang akan datang. Setelah batas itu lewat entry kedaluwarsa sendiri dan dihitung
+ulang, jadi tidak ada voucher kedaluwarsa yang tersaji dari cache. Perubahan
+Voucher membuang entry lewat signal.
+
+Halaman detail laundry dan checkout sama-sama memakai active_vouchers().
+"""
+from django.core.cache import cache
+from django.utils import timezone
+import math
+
+# TTL maksimum jika tidak ada batas periode dalam waktu dekat
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _cache_key(laundry_id):
+    return f'laundry_vouchers:{laundry_id}'
+
+
+def invalidate(laundry_id):
+    cache.delete(_cache_key(laundry_id))
+
+
+def _load(laundry_id, now):
+    """(voucher aktif, TTL detik) dari satu query voucher aktif & yang akan datang"""
+    from .models import Voucher
+
+    candidates = Voucher.objects.filter(
+        laundry_id=laundry_id,
+        is_active=True,
+        is_approved=True,
+        valid_until__gte=now,
+    )
+    active = []
+    boundaries = []
+    for voucher in candidates:
+        if voucher.valid_from <= now:
+            active.append(voucher)
+            boundaries.append(voucher.valid_until)
+        else:
+            boundaries.append(voucher.valid_from)
+
+    timeout = CACHE_TIMEOUT
+    if boundaries:
+        timeout = min(timeout, math.ceil((min(boundaries) - now).total_seconds()))
+    return active, max(timeout, 1)
+
+
+def active_vouchers(laundry):
+    """List voucher aktif milik laundry (instance atau id), urutan terbaru dulu"""
+    laundry_id = getattr(laundry, 'pk', laundry)
+    key = _cache_key(laundry_id)
+    vouchers = cache.get(key)
+    if vouchers is None:
+        vouchers, timeout = _load(laundry_id, timezone.now())
+        cache.set(key, vouchers, timeout)
+    return vouchers
+
@@ -8,9 +8,18 @@ echo "Starting Gunicorn..."
 # Run database migrations
 python manage.py migrate --noinput
 
+# Create cache table (shared cache between gunicorn workers)
+python manage.py createcachetable
+
 # Collect static files
 python manage.py collectstatic --noinput
 
+# Sweeper jadwal: update status buka/tutup laundry setiap jam operasional berganti
+python manage.py sweep_open_status --loop &
+
+# Leaderboard laundry terbaik per kota/kecamatan untuk dashboard
+python manage.py refresh_laundry_rankings --loop &
+
 # Start Gunicorn
 gunicorn config.wsgi:application \
     --bind=0.0.0.0:8000 \